@@ -1,37 +1,97 @@
 # Main.py
 import streamlit as st
 
+import perf
+
 from score_calculator import score_calculator_page
 from scoreboard import scoreboard_page
 from summary_storage import summary_storage_page
 from consistency import compute_consistency_bonuses
-from storage import load_data, save_data  # 👈 add this
+from shared_store import refresh_session_views, get_shared_season
+from frame_cache import get_frame_cache
+from standings import StandingsAggregator
+from ratings import RatingHistory
+from head_to_head import HeadToHead
+from chart_series import CumulativeSeries
 
 
 
 PLAYERS = ["Amber", "Mandeep", "Rav", "Simer"]
 
+# Reruns kept in the Performance panel's export
+PERF_HISTORY_SIZE = 200
 
-def init_state():
-    if "games" not in st.session_state or "summaries" not in st.session_state:
-        games, summaries = load_data()   # 👈 load from JSON
-
-        st.session_state.games = games
-        st.session_state.summaries = summaries
 
-    if "next_game_id" not in st.session_state:
-        # derive next_game_id from existing games
-        games = st.session_state.games
-        if isinstance(games, list) and games:
-            max_id = max(g.get("game_id", 0) for g in games)
-            st.session_state.next_game_id = max_id + 1
-        else:
-            st.session_state.next_game_id = 1
+def init_state():
+    with perf.stage("init_state"):
+        # games + summaries live once per process; this session gets read-only views
+        refresh_session_views()
+
+        if "standings" not in st.session_state:
+            # running standings, rebuilt once here and then updated per saved game
+            st.session_state.standings = StandingsAggregator(PLAYERS)
+            st.session_state.standings.rebuild(st.session_state.games)
+
+        if "ratings" not in st.session_state:
+            # Elo after every game, kept in step with the standings
+            st.session_state.ratings = RatingHistory(PLAYERS)
+            st.session_state.ratings.sync(st.session_state.standings)
+
+        if "head_to_head" not in st.session_state:
+            st.session_state.head_to_head = HeadToHead(PLAYERS)
+            st.session_state.head_to_head.sync(st.session_state.standings)
+
+        if "cumulative" not in st.session_state:
+            # downsampled points-progression series, extended per saved game
+            st.session_state.cumulative = CumulativeSeries(PLAYERS)
+            st.session_state.cumulative.sync(st.session_state.standings)
+
+
+def durability_caption():
+    """Sidebar line: whether every saved change has reached disk yet."""
+    state = get_shared_season().durability()
+    if state["state"] == "error":
+        st.sidebar.caption(f"⚠️ Saving to disk failed, retrying: {state['error']}")
+    elif state["state"] == "pending":
+        st.sidebar.caption(f"💾 Writing {state['pending']} change(s) to disk…")
+    else:
+        st.sidebar.caption("💾 All changes saved to disk.")
+    if state["compact_error"] is not None:
+        st.sidebar.caption(f"Compacting the journal failed, retried after the next save: "
+                           f"{state['compact_error']}")
+
+
+def performance_panel(run):
+    """Optional sidebar panel: this rerun's stage timings + exportable history."""
+    with st.sidebar.expander("Performance"):
+        st.checkbox("Enable timing", value=perf.DEFAULT_ENABLED, key="perf_enabled")
+
+        history = st.session_state.setdefault("perf_history", [])
+        if run is not None:
+            history.append(run.to_dict())
+            del history[:-PERF_HISTORY_SIZE]
+
+        if not history:
+            st.caption("Timing is off.")
+            return
+
+        last = history[-1]
+        st.table(
+            [{"Stage": k, "ms": v} for k, v in last["stages_ms"].items()]
+            + [{"Stage": k, "ms": v} for k, v in last["counters"].items()]
+        )
+        st.download_button(
+            "Export timings (JSON lines)",
+            perf.to_jsonl(history),
+            file_name="marioparty_perf.jsonl",
+            mime="application/x-ndjson",
+        )
 
 
 
 def main():
     st.set_page_config(page_title="Mario Party Championship", layout="wide")
+    perf.begin_run(st.session_state.get("perf_enabled", perf.DEFAULT_ENABLED))
     init_state()
 
     st.title("Mario Party Championship – 2025 Rules")
@@ -48,6 +108,15 @@ def main():
     elif page ==  "Summary Sheets":
         summary_storage_page(PLAYERS)
 
+    stats = get_frame_cache().stats()
+    st.sidebar.caption(
+        f"Frame cache: {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['size']}/{stats['maxsize']} frames)"
+    )
+    durability_caption()
+
+    performance_panel(perf.end_run())
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,244 @@
+# api_server.py
+#
+# Read-only HTTP/JSON API for stream overlays and lobby screens, so polling
+# the scores does not rerun the Streamlit app:
+#
+#   GET /standings                     current standings (the Scoreboard table)
+#   GET /breakdown?offset=0&limit=500  per-game breakdown, paginated by game
+#   GET /cumulative                    total points after every game, per player
+#   GET /version                       data version and number of games
+#
+# Bodies are built once per data version and kept as bytes. Every response
+# carries an ETag of that version, so a poller sending If-None-Match gets a
+# bodyless 304 until something is saved. A background thread picks up saves
+# from the app processes every POLL_INTERVAL seconds. The games are read
+# through storage.py alone (no Streamlit, no writer thread): this process
+# never writes.
+#
+#   python api_server.py --port 8765 --players Amber,Mandeep,Rav,Simer
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import storage
+from scoring import RULE_COLUMNS
+from standings import StandingsAggregator, standings_rows
+
+# Seconds between checks for games saved by the app
+POLL_INTERVAL = 0.5
+
+# /breakdown page size (in games) by default, and at most
+BREAKDOWN_PAGE_SIZE = 500
+BREAKDOWN_MAX_PAGE_SIZE = 5000
+
+# Cached bodies per data version (breakdown pages each take one)
+MAX_CACHED_BODIES = 256
+
+
+class StandingsAPI:
+    """
+    Response cache over a game table (from storage.load_table) and a
+    StandingsAggregator.
+
+    get(path, query) returns (etag, body bytes); bodies are built on first
+    request after each data change, so repeated polls cost a dict lookup.
+    """
+
+    def __init__(self, games, players):
+        self.games = games
+        self.players = list(players)
+        self.standings = StandingsAggregator(self.players)
+        self._lock = threading.Lock()
+        self._n_synced = None
+        self._bodies = {}
+        self.etag = None
+        # path -> (body builder, query parameters it takes)
+        self.routes = {
+            "/standings": (self._standings, ()),
+            "/breakdown": (self._breakdown, ("offset", "limit")),
+            "/cumulative": (self._cumulative, ()),
+            "/version": (self._version, ()),
+        }
+        self.refresh()
+
+    def refresh(self):
+        """Pick up saves from other processes; drop cached bodies if anything changed."""
+        with self._lock:
+            self._poll_games()
+            if len(self.games) == self._n_synced:
+                return
+            self.standings.sync(self.games.view())
+            self._n_synced = len(self.games)
+            self.etag = f'"{storage.data_version()}-{self.standings.n_games}"'
+            self._bodies = {}
+
+    def _poll_games(self):
+        """Append the games other processes saved since the last poll (summaries are not served)."""
+        events, snapshot = storage.poll()
+        new = [e["data"] for e in events if e["type"] == "game"]
+        game_ids = None
+        if snapshot is not None:
+            # another process compacted: its games may only be in the
+            # snapshot now, so merge by id
+            table, _ = snapshot
+            game_ids = set(self.games.numpy_column("game_id").tolist())
+            new = [table.game(i) for i in range(len(table))] + new
+
+        for game in new:
+            if game_ids is not None:
+                if game["game_id"] in game_ids:
+                    continue
+                game_ids.add(game["game_id"])
+            self.games.append(game)
+
+    def get(self, path, query=""):
+        """
+        Returns: (etag, body). Raises KeyError for an unknown path and
+        ValueError for a bad query.
+        """
+        build, names = self.routes[path]
+        # other parameters (e.g. cache busters) do not split the cache
+        query = parse_qs(query) if names and query else {}
+        params = {name: query[name][-1] for name in names if name in query}
+        key = (path,) + tuple(params.get(name) for name in names)
+
+        cached = self._bodies.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached is None:
+                body = json.dumps(build(**params), separators=(",", ":")).encode("utf-8")
+                if len(self._bodies) >= MAX_CACHED_BODIES:
+                    self._bodies = {}
+                cached = self._bodies[key] = (self.etag, body)
+        return cached
+
+    # ---------- Bodies (built under _lock) ----------
+
+    def _header(self):
+        return {"version": storage.data_version(), "n_games": self.standings.n_games}
+
+    def _version(self):
+        return self._header()
+
+    def _standings(self):
+        standings = self.standings
+        snapshot = standings.standings_at(standings.n_games)
+        rows = sorted(
+            standings_rows(snapshot, self.players),
+            key=lambda row: (row["Rank"], row["Player"]),
+        )
+        return dict(self._header(), game_id=snapshot["game_id"], standings=rows)
+
+    def _breakdown(self, offset="0", limit=None):
+        try:
+            offset = max(int(offset), 0)
+            limit = BREAKDOWN_PAGE_SIZE if limit is None else int(limit)
+        except ValueError:
+            raise ValueError("offset and limit must be integers") from None
+        limit = max(0, min(limit, BREAKDOWN_MAX_PAGE_SIZE))
+
+        n_players = len(self.players)
+        rows = slice(offset * n_players, (offset + limit) * n_players)
+        columns = self.standings.columns
+        names = ["game_id", "placement"] + RULE_COLUMNS + ["base_total", "consistency"]
+        values = {name: columns[name][rows].tolist() for name in names}
+        players = [self.players[j] for j in columns["player"][rows]]
+
+        breakdown = []
+        for i, player in enumerate(players):
+            row = {name: values[name][i] for name in names}
+            row["player"] = player
+            row["total"] = row["base_total"] + row["consistency"]
+            breakdown.append(row)
+        return dict(self._header(), offset=offset, limit=limit, rows=breakdown)
+
+    def _cumulative(self):
+        return dict(
+            self._header(),
+            game_ids=self.standings.game_ids,
+            totals={p: self.standings.running_totals(p) for p in self.players},
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-alive: pollers reuse one connection
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            etag, body = self.server.api.get(url.path, url.query)
+        except KeyError:
+            return self._send(404, json.dumps({"error": "not found"}).encode("utf-8"))
+        except ValueError as e:
+            return self._send(400, json.dumps({"error": str(e)}).encode("utf-8"))
+
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            return self._send(304, b"", etag)
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            # cache, but revalidate every time
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # one line per poll would cost more than the poll
+        pass
+
+
+def make_server(api, host="127.0.0.1", port=8765):
+    """An HTTP server for api (call serve_forever() on it)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.api = api
+    return server
+
+
+def _poll_forever(api, interval):
+    while True:
+        time.sleep(interval)
+        api.refresh()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the standings as JSON over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--players", help="comma-separated players (default: every stored player)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    games, _ = storage.load_table()
+    players = args.players.split(",") if args.players else list(games.players)
+    api = StandingsAPI(games, players)
+    threading.Thread(
+        target=_poll_forever, args=(api, args.poll_interval), name="api-poll", daemon=True
+    ).start()
+
+    server = make_server(api, args.host, args.port)
+    print(f"Serving standings on http://{args.host}:{args.port}/standings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmark.py
+#
+# Benchmark suite over synthetic seasons. Results go to a JSON file so runs
+# from different commits can be compared.
+#
+#   python benchmark.py                       # 10, 1k, 100k, 1M games
+#   python benchmark.py --sizes 10,1000 --output bench_results.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import storage
+from consistency import compute_consistency_bonuses
+from scoring import compute_game_points, compute_game_points_breakdown, assign_ranks
+from synthetic import DEFAULT_PLAYERS, generate_season
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+
+
+def _time(fn, repeat):
+    """Best wall time of `repeat` runs, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _bench_storage_round_trip(games):
+    with tempfile.TemporaryDirectory() as tmp:
+        names = ("DATA_FILE", "JOURNAL_FILE", "SEASON_FILE", "LOCK_FILE", "VERSION_FILE")
+        old_files = {name: getattr(storage, name) for name in names}
+        for name, path in old_files.items():
+            setattr(storage, name, os.path.join(tmp, path))
+        try:
+            storage.save_data(games, [])
+            loaded, _ = storage.load_data()
+        finally:
+            for name, path in old_files.items():
+                setattr(storage, name, path)
+    assert len(loaded) == len(games)
+
+
+def _bench_scoreboard_frames(games, players):
+    """
+    The frames scoreboard_page builds. Streamlit and pandas are imported
+    here (lazily, and before any timing starts).
+    Returns: the callable to time.
+    """
+    from scoreboard import (
+        build_cumulative_chart_df,
+        build_standings_df,
+        build_breakdown_df,
+        BREAKDOWN_PAGE_SIZES,
+    )
+    from chart_series import CumulativeSeries
+    from standings import StandingsAggregator
+
+    def frames():
+        standings = StandingsAggregator(players)
+        standings.rebuild(games)
+        series = CumulativeSeries(players)
+        series.sync(standings)
+        build_cumulative_chart_df(standings, players, series)
+        build_standings_df(standings, players)
+        build_breakdown_df(standings, limit=BREAKDOWN_PAGE_SIZES[0])
+
+    return frames
+
+
+def benchmarks(games, players, only=None):
+    """(name, callable) pairs timed for one season size (only: names to keep)."""
+    totals = [compute_game_points(g, players) for g in games]
+    entries = [
+        ("compute_game_points", lambda: [compute_game_points(g, players) for g in games]),
+        (
+            "compute_game_points_breakdown",
+            lambda: [compute_game_points_breakdown(g, players) for g in games],
+        ),
+        ("compute_consistency_bonuses", lambda: compute_consistency_bonuses(games, players)),
+        ("assign_ranks", lambda: [assign_ranks(t) for t in totals]),
+        ("storage_round_trip", lambda: _bench_storage_round_trip(games)),
+    ]
+    if not only or "scoreboard_frames" in only:
+        entries.append(("scoreboard_frames", _bench_scoreboard_frames(games, players)))
+    return [(name, fn) for name, fn in entries if not only or name in only]
+
+
+def _git_commit():
+    try:
+        # the checkout benchmark.py lives in, wherever it is run from
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run(sizes, repeat, players=DEFAULT_PLAYERS, seed=0, only=None, log=sys.stderr):
+    results = []
+    for n_games in sizes:
+        games = generate_season(n_games, players, seed)
+        for name, fn in benchmarks(games, players, only):
+            seconds = _time(fn, repeat if n_games < 100_000 else 1)
+            results.append(
+                {
+                    "name": name,
+                    "n_games": n_games,
+                    "seconds": seconds,
+                    "games_per_second": n_games / seconds if seconds else None,
+                }
+            )
+            print(f"{name:32s} {n_games:>9d} games  {seconds * 1000:10.2f} ms", file=log)
+        del games
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scoring, storage and frames.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(n) for n in DEFAULT_SIZES),
+        help="comma-separated season sizes (games)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (best kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma-separated benchmark names to run")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.only.split(",")) if args.only else None
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": run(sizes, args.repeat, seed=args.seed, only=only),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
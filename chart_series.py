@@ -0,0 +1,157 @@
+# chart_series.py
+#
+# Downsampled running totals for the points-progression chart. Games are cut
+# into equal buckets; each bucket keeps its first game and the game where
+# every player's total is lowest and highest (min/max downsampling), so
+# spikes and dips survive. Both games around every lead change are kept as
+# well, so the lines still cross where the lead changed hands.
+#
+# Complete buckets are kept between reruns: an appended game only touches
+# the last, partial bucket. When there are too many buckets, neighbours are
+# merged pairwise (the bucket width doubles), from their kept games alone.
+import numpy as np
+
+import perf
+from game_table import numpy_slice
+
+# Most complete buckets drawn (each keeps at most 1 + 2 * players games)
+CHART_BUCKETS = 500
+
+
+class CumulativeSeries:
+    """
+    Downsampled total points (base + consistency) per player after each game,
+    read from a StandingsAggregator's prefix sums.
+
+    Holds:
+      width        -> games per bucket (a power of two)
+      buckets      -> [(rows, totals)] for every complete bucket: kept game
+                      indices (season order) and their rows x players totals
+      lead_changes -> game indices where the leader differs from the game before
+
+    Call sync(standings) after standings.sync(games); rows() / frame() then
+    give the games to draw.
+    """
+
+    def __init__(self, players, max_buckets=CHART_BUCKETS):
+        self.players = list(players)
+        self.max_buckets = max_buckets
+        self.reset()
+
+    def reset(self):
+        self.width = 1
+        self.buckets = []
+        self.lead_changes = []
+        self.n_games = 0
+        self._leader = None
+        self._rebuilds = None
+
+    @staticmethod
+    def _totals(standings, start, stop):
+        """stop - start x players totals after games start..stop-1."""
+        n_players = len(standings.players)
+        span = slice((start + 1) * n_players, (stop + 1) * n_players)
+        base = numpy_slice(standings.prefix["base_total"], span)
+        consistency = numpy_slice(standings.prefix["consistency"], span)
+        return (base + consistency).reshape(-1, n_players)
+
+    @staticmethod
+    def _bucket_rows(totals):
+        """Kept rows of each bucket in a buckets x width x players block."""
+        n_buckets, width, _ = totals.shape
+        first = np.zeros((n_buckets, 1), dtype=np.int64)
+        kept = np.concatenate([first, totals.argmin(axis=1), totals.argmax(axis=1)], axis=1)
+        return kept + (np.arange(n_buckets) * width)[:, None]
+
+    def _add_buckets(self, standings, stop):
+        """Append the complete buckets that end at or before game stop."""
+        start = len(self.buckets) * self.width
+        n_new = (stop - start) // self.width
+        if n_new <= 0:
+            return
+        totals = self._totals(standings, start, start + n_new * self.width)
+        kept = self._bucket_rows(totals.reshape(n_new, self.width, -1))
+        for rows in kept:
+            rows = np.unique(rows)
+            self.buckets.append((rows + start, totals[rows]))
+
+    def _merge_buckets(self):
+        """Halve the bucket count; an odd last bucket goes back to the partial one."""
+        merged = []
+        for a in range(0, len(self.buckets) - 1, 2):
+            rows = np.concatenate([self.buckets[a][0], self.buckets[a + 1][0]])
+            totals = np.concatenate([self.buckets[a][1], self.buckets[a + 1][1]])
+            # the merged first / lows / highs are among the kept games of the halves
+            keep = np.unique(np.concatenate([[0], totals.argmin(axis=0), totals.argmax(axis=0)]))
+            merged.append((rows[keep], totals[keep]))
+        self.buckets = merged
+        self.width *= 2
+
+    def _add_lead_changes(self, standings, start, stop):
+        leader = self._totals(standings, start, stop).argmax(axis=1)
+        previous = np.concatenate([[leader[0] if self._leader is None else self._leader], leader[:-1]])
+        self.lead_changes.extend((np.flatnonzero(leader != previous) + start).tolist())
+        self._leader = int(leader[-1])
+
+    def sync(self, standings):
+        """
+        Catch up with the aggregate (which must have the same players).
+        Returns "unchanged", "appended" or "rebuilt".
+        """
+        status = "appended"
+        if standings.rebuilds != self._rebuilds or standings.n_games < self.n_games:
+            self.reset()
+            self._rebuilds = standings.rebuilds
+            status = "rebuilt"
+        n, stop = self.n_games, standings.n_games
+        if stop == n and status == "appended":
+            return "unchanged"
+
+        with perf.stage("chart_series"):
+            while stop // self.width > self.max_buckets:
+                if self.buckets:
+                    self._merge_buckets()
+                else:
+                    self.width *= 2
+            self._add_buckets(standings, stop)
+            if stop > n:
+                self._add_lead_changes(standings, n, stop)
+        self.n_games = stop
+        return status
+
+    def rows(self, standings):
+        """Game indices to draw (season order): the buckets, lead changes and last game."""
+        n_games = self.n_games
+        if not n_games:
+            return np.zeros(0, dtype=np.int64)
+        parts = [rows for rows, _ in self.buckets]
+
+        # the partial bucket, from the games themselves (at most `width` of them)
+        start = len(self.buckets) * self.width
+        if start < n_games:
+            totals = self._totals(standings, start, n_games)
+            parts.append(self._bucket_rows(totals[None]).ravel() + start)
+
+        changes = np.array(self.lead_changes, dtype=np.int64)
+        parts += [changes - 1, changes, [n_games - 1]]
+        rows = np.unique(np.concatenate(parts))
+        return rows[rows >= 0]
+
+    def frame(self, standings):
+        """
+        The downsampled chart data.
+        Returns: (game_ids, {player: totals}) over rows(), as lists.
+        """
+        n_players = len(self.players)
+        base = standings.prefix["base_total"]
+        consistency = standings.prefix["consistency"]
+        game_id = standings.columns["game_id"]
+        rows = self.rows(standings).tolist()
+
+        totals = {}
+        for j, p in enumerate(self.players):
+            totals[p] = [
+                base[(r + 1) * n_players + j] + consistency[(r + 1) * n_players + j]
+                for r in rows
+            ]
+        return [game_id[r * n_players] for r in rows], totals
@@ -0,0 +1,114 @@
+# cli.py
+#
+# Headless scorer: reads games as JSON lines, writes per-game points and the
+# final standings as JSON lines. Only pure-Python modules are imported, so it
+# starts without loading Streamlit, pandas or NumPy.
+#
+#   python cli.py games.jsonl
+#   cat games.jsonl | python cli.py --players Amber,Mandeep,Rav,Simer
+import argparse
+import json
+import os
+import sys
+
+from standings import StandingsAggregator
+
+
+def iter_games(lines):
+    """Yield (line_number, game) for every non-blank JSON line."""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_number}: invalid JSON ({e.msg})") from None
+
+
+def score_stream(lines, out, players=None, per_game=True):
+    """
+    Score games (in season order) from an iterable of JSON lines.
+
+    Writes one {"type": "game", ...} line per game (unless per_game is False),
+    then one {"type": "standings", ...} line per player, sorted by rank.
+    Players default to the result keys of the first game.
+    """
+    standings = None
+
+    for line_number, game in iter_games(lines):
+        if not isinstance(game, dict):
+            raise ValueError(f"line {line_number}: bad game record (not a JSON object)")
+        try:
+            if standings is None:
+                standings = StandingsAggregator(players or list(game["results"]))
+            standings.append(game)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"line {line_number}: bad game record ({e!r})") from None
+
+        if per_game:
+            # the aggregate's breakdown columns end with this game's rows
+            rows = slice(-len(standings.players), None)
+            record = {
+                "type": "game",
+                "game_id": game.get("game_id"),
+                "points": dict(zip(standings.players, standings.columns["base_total"][rows])),
+                "consistency": dict(
+                    zip(standings.players, standings.columns["consistency"][rows])
+                ),
+            }
+            out.write(json.dumps(record) + "\n")
+
+    if standings is None:
+        return
+
+    for p in sorted(standings.players, key=lambda p: (standings.ranks[p], p)):
+        record = {
+            "type": "standings",
+            "rank": standings.ranks[p],
+            "player": p,
+            "wins": standings.wins[p],
+            "podiums": standings.podiums[p],
+            "base_points": standings.base_totals[p],
+            "consistency_bonus": standings.consistency_totals[p],
+            "total_points": standings.final_totals[p],
+        }
+        out.write(json.dumps(record) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score Mario Party games (JSON lines) without the web UI."
+    )
+    parser.add_argument(
+        "file", nargs="?", default="-", help="games as JSON lines (default: stdin)"
+    )
+    parser.add_argument(
+        "--players", help="comma-separated player order (default: from first game)"
+    )
+    parser.add_argument(
+        "--standings-only", action="store_true", help="skip the per-game lines"
+    )
+    args = parser.parse_args(argv)
+
+    players = args.players.split(",") if args.players else None
+
+    try:
+        if args.file == "-":
+            score_stream(sys.stdin, sys.stdout, players, not args.standings_only)
+        else:
+            with open(args.file, "r", encoding="utf-8") as f:
+                score_stream(f, sys.stdout, players, not args.standings_only)
+    except BrokenPipeError:
+        # downstream closed the pipe (e.g. `| head`); silence the exit flush
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
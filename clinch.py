@@ -0,0 +1,217 @@
+# clinch.py
+#
+# Exact "has X clinched first?" / "is Y eliminated?" answers for the
+# championship. Stars, coins and the single-winner flags only ever add to
+# one player and take from the others independently of placements, so they
+# are fixed at their bounds; what is searched is the placements of the
+# remaining games and the consistency bonuses they trigger.
+#
+# Ties follow assign_ranks: players level on points share 1st place.
+import itertools
+from functools import lru_cache
+
+from consistency import ConsistencyTracker
+from scoring import (
+    PLACEMENT_POINTS,
+    SEASON_GAMES,
+    MAX_BONUS_STARS,
+    MAX_COINS,
+    compute_game_points,
+    assign_ranks,
+)
+
+
+def extreme_game_points(n_players, max_bonus_stars=MAX_BONUS_STARS, max_coins=MAX_COINS):
+    """
+    Non-placement points of one game at the bounds, from compute_game_points.
+
+    Returns: (best, worst) where best is what one player gets with max stars,
+    max coins and both single-winner flags, and worst is what every other
+    player gets at the same time (no stars, no coins).
+    """
+    players = list(range(n_players))
+    results = {
+        p: {
+            "placement": p + 1,
+            "bonus_stars": 0,
+            "coins": 0,
+            "most_items_used": False,
+            "most_spaces_travelled": False,
+        }
+        for p in players
+    }
+    results[0].update(
+        bonus_stars=max_bonus_stars,
+        coins=max_coins,
+        most_items_used=True,
+        most_spaces_travelled=True,
+    )
+    points = compute_game_points({"results": results}, players)
+    best = points[0] - PLACEMENT_POINTS.get(1, 0)
+    worst = points[1] - PLACEMENT_POINTS.get(2, 0)
+    return best, worst
+
+
+def _normalize(state):
+    """
+    Collapse consistency states that score the same from here on:
+    a Top 2 streak of 3+ pays like 3, and one 4th place voids the block.
+    """
+    top2_streak, block_games, block_fourths = state
+    return (min(top2_streak, 3), block_games, min(block_fourths, 1))
+
+
+@lru_cache(maxsize=None)
+def _step(state, placement):
+    """(next_state, consistency_bonus) for one player finishing at placement."""
+    tracker = ConsistencyTracker(["p"])
+    (
+        tracker.top2_streak["p"],
+        tracker.block_games["p"],
+        tracker.block_fourths["p"],
+    ) = state
+    bonus = tracker.push_placement("p", placement)
+    return _normalize(tracker.state("p")), bonus
+
+
+@lru_cache(maxsize=None)
+def _pair_gain(a, b, remaining, n_players, best, worst, pick):
+    """
+    Max (pick="max") or min (pick="min") of points(a) - points(b) over the
+    remaining games, with a on the best and b on the worst non-placement
+    points every game. a / b are normalized consistency states.
+    """
+    if remaining == 0:
+        return 0
+    choose = max if pick == "max" else min
+    gains = []
+    for pa, pb in itertools.permutations(range(1, n_players + 1), 2):
+        a2, bonus_a = _step(a, pa)
+        b2, bonus_b = _step(b, pb)
+        game_gain = (
+            PLACEMENT_POINTS.get(pa, 0) + best + bonus_a
+            - PLACEMENT_POINTS.get(pb, 0) - worst - bonus_b
+        )
+        gains.append(game_gain + _pair_gain(a2, b2, remaining - 1, n_players, best, worst, pick))
+    return choose(gains)
+
+
+class _FirstPlaceSearch:
+    """
+    Branch-and-bound over placement permutations for "can player finish 1st?".
+
+    Node: (remaining, own state, sorted (margin, state) of every opponent),
+    margin = own points - opponent points. Opponents are interchangeable, so
+    sorting them merges equivalent branches; visited nodes are memoized.
+    """
+
+    def __init__(self, n_players, best, worst):
+        self.n_players = n_players
+        self.best = best
+        self.worst = worst
+        self.memo = {}
+        self.nodes = 0
+        # Own best placements first; the closest opponent gets the worst ones
+        self.orders = sorted(
+            itertools.permutations(range(1, n_players + 1)),
+            key=lambda perm: (perm[0], [-x for x in perm[1:]]),
+        )
+
+    def _gain(self, a, b, remaining, pick):
+        return _pair_gain(a, b, remaining, self.n_players, self.best, self.worst, pick)
+
+    def can_finish_first(self, remaining, own, opponents):
+        # Guaranteed whatever the placements: every margin stays >= 0
+        if all(m + self._gain(own, s, remaining, "min") >= 0 for m, s in opponents):
+            return True
+        # Some opponent stays ahead even in the best pairwise case
+        if any(m + self._gain(own, s, remaining, "max") < 0 for m, s in opponents):
+            return False
+
+        key = (remaining, own, opponents)
+        if key in self.memo:
+            return self.memo[key]
+        self.nodes += 1
+
+        found = False
+        seen = set()
+        for perm in self.orders:
+            own2, own_bonus = _step(own, perm[0])
+            own_pts = PLACEMENT_POINTS.get(perm[0], 0) + self.best + own_bonus
+            children = []
+            for (margin, state), placement in zip(opponents, perm[1:]):
+                state2, bonus = _step(state, placement)
+                opp_pts = PLACEMENT_POINTS.get(placement, 0) + self.worst + bonus
+                children.append((margin + own_pts - opp_pts, state2))
+            child = (own2, tuple(sorted(children)))
+            if child in seen:
+                continue
+            seen.add(child)
+            if self.can_finish_first(remaining - 1, *child):
+                found = True
+                break
+
+        self.memo[key] = found
+        return found
+
+
+def _season_state(standings, season_games):
+    players = standings.players
+    remaining = max(season_games - standings.n_games, 0)
+    totals = {p: standings.final_totals[p] for p in players}
+    states = {p: _normalize(standings.consistency.state(p)) for p in players}
+    return players, remaining, totals, states
+
+
+def has_clinched(standings, player, season_games=SEASON_GAMES,
+                 max_bonus_stars=MAX_BONUS_STARS, max_coins=MAX_COINS):
+    """True if player finishes 1st (alone or tied) in every possible completion."""
+    players, remaining, totals, states = _season_state(standings, season_games)
+    best, worst = extreme_game_points(len(players), max_bonus_stars, max_coins)
+
+    # No single rival can get strictly ahead (exact: any two placements
+    # extend to a full permutation of the other players)
+    for rival in players:
+        if rival == player:
+            continue
+        gain = _pair_gain(
+            states[rival], states[player], remaining, len(players), best, worst, "max"
+        )
+        if totals[rival] - totals[player] + gain > 0:
+            return False
+    return True
+
+
+def is_eliminated(standings, player, season_games=SEASON_GAMES,
+                  max_bonus_stars=MAX_BONUS_STARS, max_coins=MAX_COINS):
+    """True if player cannot finish 1st (alone or tied) in any possible completion."""
+    players, remaining, totals, states = _season_state(standings, season_games)
+    best, worst = extreme_game_points(len(players), max_bonus_stars, max_coins)
+
+    search = _FirstPlaceSearch(len(players), best, worst)
+    opponents = tuple(
+        sorted((totals[player] - totals[p], states[p]) for p in players if p != player)
+    )
+    return not search.can_finish_first(remaining, states[player], opponents)
+
+
+def clinch_status(standings, season_games=SEASON_GAMES,
+                  max_bonus_stars=MAX_BONUS_STARS, max_coins=MAX_COINS):
+    """
+    Returns: {player: "clinched" | "eliminated" | "alive"} for 1st place.
+    Once the season is over this is just the final ranks.
+    """
+    players, remaining, totals, _ = _season_state(standings, season_games)
+    if remaining == 0:
+        ranks = assign_ranks(totals)
+        return {p: "clinched" if ranks[p] == 1 else "eliminated" for p in players}
+
+    status = {}
+    for p in players:
+        if has_clinched(standings, p, season_games, max_bonus_stars, max_coins):
+            status[p] = "clinched"
+        elif is_eliminated(standings, p, season_games, max_bonus_stars, max_coins):
+            status[p] = "eliminated"
+        else:
+            status[p] = "alive"
+    return status
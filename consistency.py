@@ -1,5 +1,79 @@
 # consistency.py
 
+# Bonus values (2025 ruleset)
+BACK_TO_BACK_TOP2_POINTS = 2
+THREE_STRAIGHT_TOP2_POINTS = 3
+NO_FOURTH_POINTS = 2
+
+# "No 4th places" is checked at the end of every block of this many games
+NO_FOURTH_BLOCK = 5
+
+
+class ConsistencyTracker:
+    """
+    Streaming consistency engine: O(1) work per player per game.
+
+    Per-player state:
+      top2_streak[player]   -> current run of consecutive Top 2 finishes
+      block_games[player]   -> games played in the current 5-game block
+      block_fourths[player] -> 4th places in the current 5-game block
+
+    push(game) returns {player: bonus} for that game, for every player
+    with a placement in it. Games must be pushed in season (game_id) order.
+    """
+
+    def __init__(self, players):
+        self.players = list(players)
+        self.top2_streak = {p: 0 for p in self.players}
+        self.block_games = {p: 0 for p in self.players}
+        self.block_fourths = {p: 0 for p in self.players}
+
+    def push(self, game):
+        results = game.get("results", {})
+        bonus = {}
+        for p in self.players:
+            if p in results and "placement" in results[p]:
+                bonus[p] = self.push_placement(p, int(results[p]["placement"]))
+        return bonus
+
+    def push_placement(self, player, placement):
+        """Advance one player's state by one game and return its bonus."""
+        bonus = 0
+
+        # ---------- Back-to-back Top 2 / Top 2 in three straight ----------
+        if placement <= 2:
+            self.top2_streak[player] += 1
+        else:
+            self.top2_streak[player] = 0
+
+        streak = self.top2_streak[player]
+        if streak >= 2:
+            bonus += BACK_TO_BACK_TOP2_POINTS
+        if streak >= 3:
+            bonus += THREE_STRAIGHT_TOP2_POINTS
+
+        # ---------- No 4th places in the current block ----------
+        self.block_games[player] += 1
+        if placement == 4:
+            self.block_fourths[player] += 1
+
+        if self.block_games[player] == NO_FOURTH_BLOCK:
+            if self.block_fourths[player] == 0:
+                bonus += NO_FOURTH_POINTS
+            self.block_games[player] = 0
+            self.block_fourths[player] = 0
+
+        return bonus
+
+    def state(self, player):
+        """(top2_streak, block_games, block_fourths) for one player."""
+        return (
+            self.top2_streak[player],
+            self.block_games[player],
+            self.block_fourths[player],
+        )
+
+
 def compute_consistency_bonuses(games, players):
     """
     Compute total consistency bonus points per player based on the full season.
@@ -8,8 +82,8 @@ def compute_consistency_bonuses(games, players):
       - Back-to-back Top 2 finishes: +2 pts (granted on the second game).
       - Top 2 in three straight games: +3 pts (granted on the third game).
       - No 4th places in the last five games: +2 pts
-        * checked after Games 5 (Games 1–5)
-        * and after Game 10 (Games 6–10).
+        * checked after Game 5 (Games 1–5), Game 10 (Games 6–10),
+          and so on for every further block of five games.
 
     Returns:
       total_bonus: dict[player] -> int (sum of all consistency bonuses)
@@ -19,58 +93,13 @@ def compute_consistency_bonuses(games, players):
     # Sort games by game_id to get season order
     games_sorted = sorted(games, key=lambda g: g.get("game_id", 0))
 
-    # Build per-player placement timeline: list of (game_id, placement)
-    placements = {p: [] for p in players}
+    tracker = ConsistencyTracker(players)
+    per_game_bonus = {p: {} for p in players}
+
     for g in games_sorted:
         gid = g.get("game_id")
-        results = g.get("results", {})
-        for p in players:
-            if p in results and "placement" in results[p]:
-                placements[p].append((gid, int(results[p]["placement"])))
-
-    # Initialize per-game bonus buckets
-    per_game_bonus = {
-        p: {gid: 0 for gid, _ in placements[p]} for p in players
-    }
-
-    for p in players:
-        pl_list = placements[p]
-        n = len(pl_list)
-        if n == 0:
-            continue
-
-        # ---------- Back-to-back Top 2 ----------
-        # If player is Top 2 in games i-1 and i, give +2 on game i
-        for i in range(1, n):
-            gid_prev, pl_prev = pl_list[i - 1]
-            gid_curr, pl_curr = pl_list[i]
-            if pl_prev <= 2 and pl_curr <= 2:
-                per_game_bonus[p][gid_curr] += 2
-
-        # ---------- Top 2 in three straight ----------
-        # If player is Top 2 in games i-2, i-1, i, give +3 on game i
-        for i in range(2, n):
-            gid1, pl1 = pl_list[i - 2]
-            gid2, pl2 = pl_list[i - 1]
-            gid3, pl3 = pl_list[i]
-            if pl1 <= 2 and pl2 <= 2 and pl3 <= 2:
-                per_game_bonus[p][gid3] += 3
-
-        # ---------- No 4th places in last 5 ----------
-        # Window 1: Games 1–5, bonus applied at game 5
-        if n >= 5:
-            window1 = pl_list[0:5]
-            if all(pl != 4 for _, pl in window1):
-                gid5, _ = pl_list[4]
-                per_game_bonus[p][gid5] += 2
-
-        # Window 2: Games 6–10, bonus applied at game 10
-        # (Assuming a 10-game season, so use entries 5–9 as "games 6–10")
-        if n >= 10:
-            window2 = pl_list[5:10]
-            if all(pl != 4 for _, pl in window2):
-                gid10, _ = pl_list[9]
-                per_game_bonus[p][gid10] += 2
+        for p, bonus in tracker.push(g).items():
+            per_game_bonus[p][gid] = per_game_bonus[p].get(gid, 0) + bonus
 
     # Sum total consistency bonus per player
     total_bonus = {
@@ -0,0 +1,66 @@
+# frame_cache.py
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+# How many built frames to keep (least recently used ones are evicted)
+FRAME_CACHE_SIZE = 32
+
+
+class FrameCache:
+    """
+    Bounded LRU cache for DataFrames derived from the games list.
+
+    Keys should include the data generation (see shared_store), so a new game
+    naturally misses and stale frames age out through LRU eviction.
+    """
+
+    def __init__(self, maxsize=FRAME_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        """Return the cached value for key, or build(), cache and return it."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        value = build()
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
+
+
+@st.cache_resource
+def get_frame_cache():
+    """The process-wide frame cache (shared by all sessions, like the season)."""
+    return FrameCache()
+
+
+def frame_key(name, players, *parts):
+    """Cache key for a frame built from the current data generation."""
+    return (name, st.session_state.get("data_generation"), tuple(players)) + parts
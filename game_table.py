@@ -0,0 +1,462 @@
+# game_table.py
+#
+# Compact in-memory game history: one typed array per field (struct of
+# arrays) instead of a dict per game and per result. Players are interned
+# to column indices; per-player fields are stored games x players, row-major.
+# Dict games only exist at the storage boundary: GameTable.append() takes
+# one, GameTable.game(i) rebuilds one.
+#
+# A table may start from a read-only base of NumPy columns (the memory-mapped
+# season file, see season_file.py); games appended after that go to the
+# array tails. Only the standard library is needed for tables built from
+# dicts; NumPy is imported lazily.
+from array import array
+from collections.abc import Sequence
+
+# Per-player result fields and their array typecodes
+RESULT_COLUMNS = {
+    "placement": "b",
+    "bonus_stars": "i",
+    "coins": "i",
+    "most_items_used": "b",
+    "most_spaces_travelled": "b",
+}
+
+# Result fields stored as 0 / 1 but read back as bools
+BOOL_FIELDS = ("most_items_used", "most_spaces_travelled")
+
+# Top-level game keys stored in their own columns (anything else is "extra")
+GAME_KEYS = ("game_id", "results", "points", "ruleset")
+
+_RESULT_KEYS = frozenset(RESULT_COLUMNS)
+_GAME_KEYS = frozenset(GAME_KEYS)
+
+# array typecode -> NumPy dtype name (for season_arrays and numpy_slice)
+NUMPY_DTYPES = {"b": "int8", "i": "int32", "q": "int64", "d": "float64"}
+
+# Every stored column: name -> (typecode, per_player). Per-player columns hold
+# one entry per game per player, the others one entry per game.
+TABLE_COLUMNS = dict(
+    {
+        "game_id": ("i", False),
+        "has_points": ("b", False),
+        "ruleset": ("b", False),
+        "present": ("b", True),
+        "points": ("i", True),
+    },
+    **{field: (code, True) for field, code in RESULT_COLUMNS.items()},
+)
+
+
+def numpy_slice(column, span=slice(None)):
+    """
+    Elements `span` of a typed array as a (read-only) NumPy array. The slice
+    is a copy, so no buffer export is left on the column, which would make
+    its next append raise BufferError.
+    """
+    import numpy as np
+
+    return np.frombuffer(column[span], dtype=NUMPY_DTYPES[column.typecode])
+
+
+class GameTable:
+    """
+    Append-only struct-of-arrays game table.
+
+    Columns:
+      game_id[i]                   -> int32
+      present[i * P + j]           -> 1 if players[j] has a result in game i
+      <result field>[i * P + j]    -> see RESULT_COLUMNS
+      has_points[i], points[i * P + j] -> the frozen per-game points, if saved
+      ruleset[i]                   -> index into rulesets (-1 = untagged)
+      extras[i]                    -> {"game": {...}, "results": {player: {...}}}
+                                      only for games with keys outside the schema
+
+    Games [0, n_base) live in base[name] (read-only NumPy arrays, see
+    from_columns); the typed arrays above hold the games appended after them.
+    """
+
+    def __init__(self):
+        self.players = []
+        self._player_index = {}
+        self.game_id = array("i")
+        self.present = array("b")
+        self.results = {field: array(code) for field, code in RESULT_COLUMNS.items()}
+        self.has_points = array("b")
+        self.points = array("i")
+        self.ruleset = array("b")
+        self.rulesets = []
+        self.extras = {}
+        # games[:sorted_upto] are in ascending game_id order
+        self.sorted_upto = 0
+        self.base = None
+        self.n_base = 0
+
+    @classmethod
+    def from_games(cls, games):
+        table = cls()
+        table.extend(games)
+        return table
+
+    @classmethod
+    def from_columns(cls, players, base, rulesets=(), extras=None, sorted_upto=None):
+        """
+        A table whose first games are read straight from NumPy columns
+        (base[name] for every TABLE_COLUMNS name, e.g. memory-mapped), without
+        copying them. Later appends go to the usual array tails.
+        """
+        table = cls()
+        table.players = list(players)
+        table._player_index = {p: j for j, p in enumerate(table.players)}
+        table.base = base
+        table.n_base = len(base["game_id"])
+        table.rulesets = list(rulesets)
+        table.extras = dict(extras or {})
+        table.sorted_upto = table.n_base if sorted_upto is None else sorted_upto
+        return table
+
+    def extend(self, games, chunk_size=4096):
+        """
+        Add many games. Chunks where every game has exactly the known players
+        and no extra keys are filled column by column; others go through append.
+        """
+        games = list(games)
+        for start in range(0, len(games), chunk_size):
+            chunk = games[start:start + chunk_size]
+            players = self.players
+            plain = bool(players) and all(
+                g.keys() <= _GAME_KEYS
+                and g["results"].keys() == self._player_index.keys()
+                and all(r.keys() <= _RESULT_KEYS for r in g["results"].values())
+                for g in chunk
+            )
+            if not plain:
+                for game in chunk:
+                    self.append(game)
+                continue
+
+            try:
+                # Built in full before any column is touched, so a bad value
+                # (missing field, non-int) can still fall back to append()
+                rows = [g["results"] for g in chunk]
+                values = {
+                    field: array(column.typecode, [r[p][field] for r in rows for p in players])
+                    for field, column in self.results.items()
+                }
+                points = [g.get("points") for g in chunk]
+                frozen = array(
+                    "i", [pts[p] if pts else 0 for pts in points for p in players]
+                )
+            except (KeyError, TypeError):
+                for game in chunk:
+                    self.append(game)
+                continue
+
+            for g in chunk:
+                self._append_game_id(int(g.get("game_id", 0)))
+
+            self.present.extend(array("b", [1]) * (len(chunk) * len(players)))
+            for field, column in self.results.items():
+                column.extend(values[field])
+            self.has_points.extend([pts is not None for pts in points])
+            self.points.extend(frozen)
+
+            for g in chunk:
+                ruleset_id = g.get("ruleset")
+                if ruleset_id is None:
+                    self.ruleset.append(-1)
+                    continue
+                if ruleset_id not in self.rulesets:
+                    self.rulesets.append(ruleset_id)
+                self.ruleset.append(self.rulesets.index(ruleset_id))
+
+    def __len__(self):
+        return self.n_base + len(self.game_id)
+
+    def _tail(self, name):
+        """The typed array holding column `name` for games after the base."""
+        return self.results[name] if name in self.results else getattr(self, name)
+
+    def _append_game_id(self, game_id):
+        n = len(self)
+        if self.sorted_upto == n and (not n or game_id > self.last_game_id):
+            self.sorted_upto += 1
+        self.game_id.append(game_id)
+
+    @property
+    def last_game_id(self):
+        if len(self.game_id):
+            return self.game_id[-1]
+        return int(self.base["game_id"][-1]) if self.n_base else None
+
+    def max_game_id(self):
+        tail = max(self.game_id, default=0)
+        if not self.n_base:
+            return tail
+        return max(tail, int(self.base["game_id"].max()))
+
+    def numpy_column(self, name, n_games=None):
+        """
+        Column `name` for the first n_games games as a flat NumPy array.
+        Within the base this is a slice of the base column (no copy).
+        """
+        import numpy as np
+
+        typecode, per_player = TABLE_COLUMNS[name]
+        n_games = len(self) if n_games is None else n_games
+        width = len(self.players) if per_player else 1
+        stop = n_games * width
+
+        base = self.base[name][:stop] if self.n_base else None
+        rest = stop - self.n_base * width
+        if rest <= 0 and base is not None:
+            return base
+        tail = numpy_slice(self._tail(name), slice(rest))
+        return tail if base is None else np.concatenate([base, tail])
+
+    def _materialize_base(self):
+        """Copy the base columns into the array tails (before a reshape)."""
+        if not self.n_base:
+            return
+        import numpy as np
+
+        for name, (typecode, _) in TABLE_COLUMNS.items():
+            column = array(typecode)
+            column.frombytes(
+                np.ascontiguousarray(self.base[name], dtype=NUMPY_DTYPES[typecode]).tobytes()
+            )
+            column.extend(self._tail(name))
+            if name in self.results:
+                self.results[name] = column
+            else:
+                setattr(self, name, column)
+        self.base = None
+        self.n_base = 0
+
+    # ---------- Storage boundary: dict -> columns ----------
+
+    def _add_player(self, player):
+        """Intern a new player: widen every games x players column by one."""
+        self._materialize_base()
+        n_players = len(self.players)
+        self._player_index[player] = n_players
+        self.players.append(player)
+
+        def widen(column, fill):
+            wide = array(column.typecode)
+            for i in range(len(self)):
+                wide.extend(column[i * n_players:(i + 1) * n_players])
+                wide.append(fill)
+            return wide
+
+        self.present = widen(self.present, 0)
+        self.points = widen(self.points, 0)
+        for field in self.results:
+            self.results[field] = widen(self.results[field], 0)
+
+    def append(self, game):
+        """Add one game (a dict in the storage schema)."""
+        results = game["results"]
+        for player in results:
+            if player not in self._player_index:
+                self._add_player(player)
+
+        self._append_game_id(int(game.get("game_id", 0)))
+
+        points = game.get("points")
+        self.has_points.append(points is not None)
+
+        extra_results = {}
+        for player in self.players:
+            r = results.get(player)
+            self.present.append(r is not None)
+            self.points.append(int(points.get(player, 0)) if points else 0)
+            if r is None:
+                for column in self.results.values():
+                    column.append(0)
+                continue
+            for field, column in self.results.items():
+                column.append(int(r.get(field, 0)))
+            if not r.keys() <= _RESULT_KEYS:
+                extra_results[player] = {k: v for k, v in r.items() if k not in _RESULT_KEYS}
+
+        ruleset_id = game.get("ruleset")
+        if ruleset_id is None:
+            self.ruleset.append(-1)
+        else:
+            if ruleset_id not in self.rulesets:
+                self.rulesets.append(ruleset_id)
+            self.ruleset.append(self.rulesets.index(ruleset_id))
+
+        if extra_results or not game.keys() <= _GAME_KEYS:
+            self.extras[len(self) - 1] = {
+                "game": {k: v for k, v in game.items() if k not in _GAME_KEYS},
+                "results": extra_results,
+            }
+
+    # ---------- Storage boundary: columns -> dict ----------
+
+    def game(self, i):
+        """Rebuild game i as a dict in the storage schema."""
+        n_players = len(self.players)
+        extra = self.extras.get(i, {})
+        extra_results = extra.get("results", {})
+
+        if i < self.n_base:
+            columns, row = self.base, i
+        else:
+            columns = {name: self._tail(name) for name in TABLE_COLUMNS}
+            row = i - self.n_base
+        start = row * n_players
+
+        results = {}
+        points = {}
+        for j, player in enumerate(self.players):
+            if not columns["present"][start + j]:
+                continue
+            r = {}
+            for field in self.results:
+                value = int(columns[field][start + j])
+                r[field] = bool(value) if field in BOOL_FIELDS else value
+            r.update(extra_results.get(player, {}))
+            results[player] = r
+            points[player] = int(columns["points"][start + j])
+
+        game = {"game_id": int(columns["game_id"][row]), "results": results}
+        if columns["has_points"][row]:
+            game["points"] = points
+        ruleset = int(columns["ruleset"][row])
+        if ruleset >= 0:
+            game["ruleset"] = self.rulesets[ruleset]
+        game.update(extra.get("game", {}))
+        return game
+
+    def view(self, length=None):
+        """Read-only view of the games appended so far (or the first `length`)."""
+        return GameTableView(self, len(self) if length is None else length)
+
+
+class GameTableView(Sequence):
+    """
+    Read-only prefix of a GameTable (same contract as shared_store.SeasonView).
+
+    Indexing rebuilds dict games; bulk readers use season_arrays() / game_ids()
+    / ruleset_counts(), which never build dicts.
+
+    order, if set, is a NumPy array of table rows: the view then lists the
+    prefix in that order (see in_season_order), still without copying games.
+    """
+
+    __slots__ = ("table", "_length", "order")
+
+    def __init__(self, table, length, order=None):
+        self.table = table
+        self._length = length
+        self.order = order
+
+    def __len__(self):
+        return self._length
+
+    def _row(self, index):
+        return index if self.order is None else int(self.order[index])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [
+                self.table.game(self._row(i)) for i in range(*index.indices(self._length))
+            ]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("GameTableView index out of range")
+        return self.table.game(self._row(index))
+
+    def __repr__(self):
+        return f"GameTableView({self._length} games)"
+
+    @property
+    def is_sorted(self):
+        """True if these games are in ascending game_id order."""
+        return self.order is not None or self._length <= self.table.sorted_upto
+
+    def in_season_order(self):
+        """
+        These games in ascending game_id order (ties keep table order): self
+        if already sorted, else a view reading the rows through an argsort
+        of the game_id column.
+        """
+        if self.is_sorted:
+            return self
+        import numpy as np
+
+        order = np.argsort(self.table.numpy_column("game_id", self._length), kind="stable")
+        return GameTableView(self.table, self._length, order)
+
+    def extended(self, length):
+        """
+        This view plus the table's games up to `length`, appended in table
+        order (the caller knows they come after every game here).
+        """
+        if self.order is None and length <= self.table.sorted_upto:
+            return GameTableView(self.table, length)
+        import numpy as np
+
+        order = np.arange(self._length) if self.order is None else self.order
+        return GameTableView(
+            self.table, length, np.concatenate([order, np.arange(self._length, length)])
+        )
+
+    def _column(self, name):
+        """Column `name` for these games, in view order (per-player: games x players)."""
+        column = self.table.numpy_column(name, self._length)
+        if TABLE_COLUMNS[name][1]:
+            column = column.reshape(self._length, len(self.table.players))
+        return column if self.order is None else column[self.order]
+
+    def game_ids(self):
+        return self._column("game_id").tolist()
+
+    def ruleset_counts(self, default=None):
+        """{ruleset_id: games}; untagged games count as `default`."""
+        import numpy as np
+
+        codes, games = np.unique(
+            self.table.numpy_column("ruleset", self._length), return_counts=True
+        )
+        counts = {}
+        for code, n in zip(codes.tolist(), games.tolist()):
+            ruleset_id = self.table.rulesets[code] if code >= 0 else default
+            counts[ruleset_id] = counts.get(ruleset_id, 0) + n
+        return counts
+
+    def season_arrays(self, players):
+        """
+        The same arrays as season_engine.load_season_arrays, read straight
+        from the columns (small dtypes kept, no dicts built). Base columns in
+        the table's own player order (and table row order) are returned as
+        views, not copies.
+        """
+        table = self.table
+        n_players = len(table.players)
+        missing = [p for p in players if p not in table._player_index]
+        if missing or not table.numpy_column("present", self._length).all():
+            # same failure load_season_arrays gives for a missing result
+            raise KeyError(missing[0] if missing else "player without a result")
+
+        cols = [table._player_index[p] for p in players]
+        in_order = cols == list(range(n_players))
+
+        def matrix(name):
+            grid = self._column(name)
+            return grid if in_order else grid[:, cols]
+
+        return {
+            "game_id": self._column("game_id"),
+            "placement": matrix("placement"),
+            "bonus_stars": matrix("bonus_stars"),
+            "coins": matrix("coins"),
+            "most_items_used": matrix("most_items_used").astype(bool),
+            "most_spaces_travelled": matrix("most_spaces_travelled").astype(bool),
+            "ruleset": self._column("ruleset"),
+            "rulesets": list(table.rulesets),
+        }
@@ -0,0 +1,151 @@
+# head_to_head.py
+#
+# Rivalry matrices: for every ordered pair of players (a, b), over the games
+# both played, how often a finished above b and how many points a gained on b
+# in total and per rule. Everything is a players x players matrix summed over
+# the aggregator's breakdown columns, so a pair lookup is an index.
+import numpy as np
+
+import perf
+from game_table import numpy_slice
+from scoring import RULE_COLUMNS
+
+# Rule columns shown together in the head-to-head view
+RULE_GROUPS = {
+    "Placement": ["placement_pts"],
+    "Stars": ["bonus_star_pts"],
+    "Coins": ["coin_threshold_pts", "coin_most_pts", "coin_least_pts"],
+    "Items": ["items_pts"],
+    "Spaces": ["spaces_pts"],
+}
+
+
+def pair_sums(placement, points):
+    """
+    Head-to-head sums over a block of games.
+
+    placement: games x players int array (0 = did not play)
+    points:    {name: games x players int array}
+
+    Returns: {"games", "above", name...: players x players int64 arrays}
+    where [a, b] sums over the games both a and b played: games counts them,
+    above counts a placing better than b, and each points name sums a - b.
+    """
+    played = placement >= 1
+    mask = played.astype(np.int64)
+    n_players = placement.shape[1]
+
+    sums = {"games": mask.T @ mask}
+    above = np.zeros((n_players, n_players), dtype=np.int64)
+    for b in range(n_players):
+        both = played & played[:, b:b + 1]
+        above[:, b] = (both & (placement < placement[:, b:b + 1])).sum(axis=0)
+    sums["above"] = above
+    for name, values in points.items():
+        # sum over shared games of (x_a - x_b) = (x m)^T m - m^T (x m)
+        scored = values.astype(np.int64) * mask
+        sums[name] = scored.T @ mask - mask.T @ scored
+    return sums
+
+
+class HeadToHead:
+    """
+    Players x players rivalry sums, kept alongside a StandingsAggregator.
+
+    Holds:
+      sums[name] -> players x players int64 array, for name in "games",
+                    "above", "total" (base + consistency) and RULE_COLUMNS
+
+    Call sync(standings) after standings.sync(games): appended games are
+    added as one block; after the aggregate rebuilds, everything is summed
+    again from its columns.
+    """
+
+    def __init__(self, players):
+        self.players = list(players)
+        self.reset()
+
+    def reset(self):
+        n_players = len(self.players)
+        names = ["games", "above", "total"] + RULE_COLUMNS
+        self.sums = {name: np.zeros((n_players, n_players), dtype=np.int64) for name in names}
+        self.n_games = 0
+        self._rebuilds = None
+
+    def _add_games(self, standings, start, stop):
+        """Add games start..stop-1 of the aggregate (season order)."""
+        n_players = len(self.players)
+        rows = slice(start * n_players, stop * n_players)
+        columns = standings.columns
+
+        def block(name):
+            return numpy_slice(columns[name], rows).reshape(-1, n_players)
+
+        points = {col: block(col) for col in RULE_COLUMNS}
+        points["total"] = block("base_total") + block("consistency")
+
+        with perf.stage("head_to_head"):
+            sums = pair_sums(block("placement"), points)
+            for name, values in sums.items():
+                self.sums[name] += values
+        perf.count("games_paired", stop - start)
+        self.n_games = stop
+
+    def rebuild(self, standings):
+        """Sum every game the aggregate holds in one pass."""
+        self.reset()
+        self._add_games(standings, 0, standings.n_games)
+        self._rebuilds = standings.rebuilds
+
+    def sync(self, standings):
+        """
+        Catch up with the aggregate (which must have the same players).
+        Returns "unchanged", "appended" or "rebuilt".
+        """
+        n = self.n_games
+        if standings.rebuilds != self._rebuilds or standings.n_games < n:
+            self.rebuild(standings)
+            return "rebuilt"
+        if standings.n_games == n:
+            return "unchanged"
+        self._add_games(standings, n, standings.n_games)
+        return "appended"
+
+    def matrix(self, name):
+        """
+        Per-shared-game matrix for a stat: "above" as a share of shared games,
+        "total", a RULE_COLUMNS name or a RULE_GROUPS name as the average
+        margin of row player over column player. NaN where a pair never met.
+        """
+        if name in RULE_GROUPS:
+            values = sum(self.sums[col] for col in RULE_GROUPS[name])
+        else:
+            values = self.sums[name]
+        games = self.sums["games"]
+        out = np.full(values.shape, np.nan)
+        np.divide(values, games, out=out, where=games > 0)
+        np.fill_diagonal(out, np.nan)
+        return out
+
+    def pair(self, a, b):
+        """
+        Head-to-head of a against b.
+        Returns: {"games", "above" (count), "above_share", "avg_margin",
+                  "rules": {RULE_GROUPS name: avg margin}}
+        """
+        i, j = self.players.index(a), self.players.index(b)
+        games = int(self.sums["games"][i, j])
+
+        def avg(values):
+            return float(values[i, j]) / games if games else 0.0
+
+        return {
+            "games": games,
+            "above": int(self.sums["above"][i, j]),
+            "above_share": avg(self.sums["above"]),
+            "avg_margin": avg(self.sums["total"]),
+            "rules": {
+                group: avg(sum(self.sums[col] for col in cols))
+                for group, cols in RULE_GROUPS.items()
+            },
+        }
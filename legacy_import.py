@@ -0,0 +1,299 @@
+# legacy_import.py
+#
+# Streaming bulk importer for legacy game archives (the games.json schema:
+# minigame_rank, most_coins / least_coins flags, image_path, no points).
+#
+#   python legacy_import.py games.json --batch-size 500
+#   python legacy_import.py archive.jsonl --dry-run
+#
+# Games are parsed incrementally, migrated to the current results schema,
+# validated per batch, given new game_ids and written through storage.py one
+# batch (one journal fsync / one SQLite transaction) at a time, and the
+# journal is folded into one snapshot at the end. Run it while the app is
+# stopped; the app picks the games up on its next start.
+import argparse
+import json
+import sys
+
+import storage
+from scoring import PLACEMENT_POINTS, DEFAULT_RULESET, compute_game_points
+
+CHUNK_SIZE = 1 << 16
+DEFAULT_BATCH_SIZE = 500
+
+# Single-winner flags: at most one player per game may hold each
+SINGLE_WINNER_FLAGS = ["most_items_used", "most_spaces_travelled"]
+
+# Legacy-only result fields that the current rules derive from coins
+DERIVED_LEGACY_FIELDS = ["most_coins", "least_coins"]
+
+
+def iter_json_records(f, chunk_size=CHUNK_SIZE):
+    """
+    Yield records from a JSON array file or a JSON-lines file, incrementally.
+
+    Only one chunk plus the record being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    in_array = None
+    eof = False
+
+    while True:
+        # Skip whitespace and separators
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(chunk_size)
+            buf, pos, eof = chunk, 0, not chunk
+
+        if pos >= len(buf):
+            return
+
+        if in_array is None:
+            in_array = buf[pos] == "["
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buf[pos] == "]":
+            return
+
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Record spans the chunk boundary: read more and retry
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        yield record
+        pos = end
+
+
+def migrate_game(legacy, game_id=None):
+    """
+    Map one legacy game onto the current schema.
+
+    - results keep placement / bonus_stars / coins
+    - most_coins / least_coins are dropped (scored from coins now)
+    - single-winner flags default to False; minigame_rank is kept as-is
+    - the archive's game_id is kept as legacy_game_id, image_path is kept
+    """
+    results = {}
+    for player, r in legacy["results"].items():
+        migrated = {
+            "placement": r.get("placement"),
+            "bonus_stars": r.get("bonus_stars", 0),
+            "coins": r.get("coins", 0),
+            "most_items_used": bool(r.get("most_items_used", False)),
+            "most_spaces_travelled": bool(r.get("most_spaces_travelled", False)),
+        }
+        for key, value in r.items():
+            if key not in migrated and key not in DERIVED_LEGACY_FIELDS:
+                migrated[key] = value
+        results[player] = migrated
+
+    game = {"game_id": game_id, "results": results}
+    if "game_id" in legacy:
+        game["legacy_game_id"] = legacy["game_id"]
+    for key, value in legacy.items():
+        if key not in ("game_id", "results", "points"):
+            game[key] = value
+    return game
+
+
+def _is_count(value):
+    """A non-negative int (JSON true / false are not counts)."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def placement_problem(placements):
+    """
+    Whether placements can be one game's finishing order: 1..N, where tied
+    players share a place and the places after a tie either run on
+    (1, 1, 2, 3) or skip the tied ones (1, 1, 3, 4), as in assign_ranks.
+    Returns: a problem string, or None.
+    """
+    ordered = sorted(placements)
+    dense, competition = [], []
+    for i, placement in enumerate(ordered):
+        if i and placement == ordered[i - 1]:
+            dense.append(dense[-1])
+            competition.append(competition[-1])
+        else:
+            dense.append(dense[-1] + 1 if dense else 1)
+            competition.append(i + 1)
+    if ordered not in (dense, competition):
+        return f"placements {ordered} are not a finishing order"
+    return None
+
+
+def validate_game(game, players):
+    """Return a list of problems with one migrated game (empty if valid)."""
+    problems = []
+    results = game["results"]
+
+    if set(results) != set(players):
+        problems.append(f"players {sorted(results)} != {sorted(players)}")
+        return problems
+
+    placements_ok = True
+    for p in players:
+        r = results[p]
+        placement = r["placement"]
+        if isinstance(placement, bool) or placement not in PLACEMENT_POINTS:
+            problems.append(f"{p}: invalid placement {placement!r}")
+            placements_ok = False
+        for field in ("bonus_stars", "coins"):
+            if not _is_count(r[field]):
+                problems.append(f"{p}: invalid {field} {r[field]!r}")
+
+    if placements_ok:
+        problem = placement_problem([results[p]["placement"] for p in players])
+        if problem:
+            problems.append(problem)
+
+    for flag in SINGLE_WINNER_FLAGS:
+        winners = [p for p in players if results[p][flag]]
+        if len(winners) > 1:
+            problems.append(f"{flag} set for several players {winners}")
+
+    return problems
+
+
+def validate_batch(batch, players):
+    """Split a batch into (valid_games, errors); errors are (legacy_game_id, problems)."""
+    valid = []
+    errors = []
+    for game in batch:
+        problems = validate_game(game, players)
+        if problems:
+            errors.append((game.get("legacy_game_id"), problems))
+        else:
+            valid.append(game)
+    return valid, errors
+
+
+def import_archive(f, players=None, first_game_id=None, batch_size=DEFAULT_BATCH_SIZE,
+                   dry_run=False, strict=False, log=sys.stderr):
+    """
+    Stream a legacy archive into storage.
+
+    Returns: (imported_count, errors) where errors is a list of
+    (legacy_game_id, problems) for games that were skipped.
+    """
+    # Without an explicit first_game_id, ids are reserved from storage batch
+    # by batch, so a running app (or another import) never hands out the same ones
+    allocate = first_game_id is None
+    # JSON backend: the stored games as a column table (memory-mapped, no
+    # game dicts), extended batch by batch, so the final snapshot is written
+    # from it without reloading the journal
+    keep_table = not dry_run and storage.STORAGE_BACKEND != "sqlite"
+    table = summaries = None
+    if allocate or keep_table:
+        table, summaries = storage.load_table()
+        if allocate:
+            first_game_id = table.max_game_id() + 1
+        if not keep_table:
+            table = summaries = None
+
+    next_game_id = first_game_id
+    imported = 0
+    all_errors = []
+    batch = []
+
+    def flush():
+        nonlocal imported, next_game_id
+        valid, errors = validate_batch(batch, players)
+        if errors and strict:
+            raise ValueError(f"legacy game {errors[0][0]}: {'; '.join(errors[0][1])}")
+        all_errors.extend(errors)
+
+        if allocate and valid and not dry_run:
+            next_game_id = storage.allocate_ids("game_id", len(valid), floor=next_game_id - 1)
+
+        # game_ids stay consecutive for the games actually written
+        for game in valid:
+            game["game_id"] = next_game_id
+            game["ruleset"] = DEFAULT_RULESET
+            game["points"] = compute_game_points(game, players)
+            next_game_id += 1
+
+        if valid and not dry_run:
+            storage.append_games(valid)
+            if table is not None:
+                for game in valid:
+                    table.append(game)
+        imported += len(valid)
+        print(f"batch: {len(valid)} imported, {len(errors)} skipped", file=log)
+        batch.clear()
+
+    for legacy in iter_json_records(f):
+        if players is None:
+            players = list(legacy["results"])
+        batch.append(migrate_game(legacy))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    if imported and table is not None:
+        compact(table, summaries)
+
+    return imported, all_errors
+
+
+def compact(table, summaries):
+    """
+    Fold the journal into one snapshot (and season mirror) after an import,
+    streamed from the import's table. Skipped if another process wrote
+    meanwhile; its own compaction covers it. (SQLite needs none: every batch
+    is already its own transaction.)
+    """
+    try:
+        storage.save_data(table.view(), summaries, expected_version=storage.data_version())
+    except storage.StaleDataError:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a legacy games archive.")
+    parser.add_argument("file", help="JSON array or JSON-lines archive")
+    parser.add_argument("--players", help="comma-separated players (default: first game)")
+    parser.add_argument("--first-game-id", type=int, help="default: after the stored games")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    parser.add_argument("--strict", action="store_true", help="stop at the first invalid game")
+    args = parser.parse_args(argv)
+
+    players = args.players.split(",") if args.players else None
+
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            imported, errors = import_archive(
+                f,
+                players=players,
+                first_game_id=args.first_game_id,
+                batch_size=args.batch_size,
+                dry_run=args.dry_run,
+                strict=args.strict,
+            )
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    for legacy_id, problems in errors:
+        print(f"skipped legacy game {legacy_id}: {'; '.join(problems)}", file=sys.stderr)
+    verb = "validated" if args.dry_run else "imported"
+    print(f"{imported} games {verb}, {len(errors)} skipped", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
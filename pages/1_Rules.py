@@ -2,20 +2,27 @@
 
 import streamlit as st
 
+from scoring import DEFAULT_RULESET, get_ruleset
+
 st.title("📜 Mario Party Championship Rules (2025)")
 
-st.caption("Balanced competition-ready ruleset for the 10-game season.")
+st.caption(
+    "Balanced competition-ready ruleset for the 10-game season "
+    f"(ruleset `{DEFAULT_RULESET}`)."
+)
 
 # 1. Placement Points
 st.header("1. Placement Points")
 
-st.markdown("""
+placement_points = get_ruleset()["placement_points"]
+
+st.markdown(f"""
 Final placement in each game awards points as follows:
 
-- 🥇 **1st place:** 8 points  
-- 🥈 **2nd place:** 6 points  
-- 🥉 **3rd place:** 4 points  
-- 🪙 **4th place:** 2 points  
+- 🥇 **1st place:** {placement_points[1]} points  
+- 🥈 **2nd place:** {placement_points[2]} points  
+- 🥉 **3rd place:** {placement_points[3]} points  
+- 🪙 **4th place:** {placement_points[4]} points  
 """)
 
 # 2. Bonus Stars
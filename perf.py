@@ -0,0 +1,96 @@
+# perf.py
+#
+# Hot-path timers and counters. A run is one Streamlit rerun (or one script
+# call); stage()/count() record into the current thread's run, and cost only
+# a thread-local lookup when no run is active (timing disabled).
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Timing on by default? (the sidebar checkbox can still toggle it per session)
+DEFAULT_ENABLED = os.environ.get("MARIOPARTY_PERF", "") == "1"
+
+_local = threading.local()
+
+
+class _NullStage:
+    """Shared no-op context manager returned while timing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class PerfRun:
+    """Stage timings (ms, summed per stage name) and counters for one run."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+
+    def add_time(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def add_count(self, name, n):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        return {
+            "ts": self.started,
+            "stages_ms": {k: round(v, 3) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def begin_run(enabled=True):
+    """Start recording on this thread (or make everything a no-op if not enabled)."""
+    _local.run = PerfRun() if enabled else None
+    return _local.run
+
+
+def end_run():
+    """Stop recording on this thread; returns the finished PerfRun (or None)."""
+    run = getattr(_local, "run", None)
+    _local.run = None
+    return run
+
+
+@contextmanager
+def _timed(run, name):
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.add_time(name, (time.perf_counter() - start) * 1000.0)
+
+
+def stage(name):
+    """Context manager timing one named stage of the current run."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NULL_STAGE
+    return _timed(run, name)
+
+
+def count(name, n=1):
+    """Add n to a named counter of the current run."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.add_count(name, n)
+
+
+def to_jsonl(runs):
+    """Serialize finished runs (PerfRun or dicts) as JSON lines."""
+    lines = []
+    for run in runs:
+        record = run.to_dict() if isinstance(run, PerfRun) else run
+        lines.append(json.dumps(record))
+    return "\n".join(lines) + ("\n" if lines else "")
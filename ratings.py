@@ -0,0 +1,252 @@
+# ratings.py
+#
+# Multiplayer Elo skill ratings from each game's placements. A game counts as
+# the round robin of pairwise results between its players (the better
+# placement wins, equal placements draw); each player moves by
+# K / (players - 1) times the sum over their pairs of (actual - expected).
+#
+# RatingHistory keeps every player's rating after every game (checkpoints),
+# so the rating at any point of the season is a lookup rather than a replay.
+import bisect
+import itertools
+from array import array
+
+import perf
+from game_table import numpy_slice
+
+# Rating of a player before their first game
+ELO_START = 1500.0
+
+# Most points a player can win or lose in one game
+ELO_K = 32.0
+
+# A rating gap of ELO_SCALE means 10:1 expected odds
+ELO_SCALE = 400.0
+
+# Games per segment when rate_history rates a long history in segments
+RATING_SEGMENT = 1024
+
+# Largest gap (rating points) left between one segment's end and the next
+# segment's start when rate_history stops refining
+RATING_TOLERANCE = 1e-9
+
+# Most passes over the segments; games not settled by then are rated one by one
+RATING_PASSES = 4
+
+
+def expected_score(rating, opponent):
+    """Expected pairwise score (win 1, draw 0.5) of `rating` against `opponent`."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / ELO_SCALE))
+
+
+def pairwise_scores(placements):
+    """Each player's total pairwise score against everyone else in one game."""
+    return [
+        sum(1.0 if p < q else 0.5 if p == q else 0.0 for q in placements) - 0.5
+        for p in placements
+    ]
+
+
+def rate_game(ratings, placements, k=ELO_K):
+    """
+    Ratings after one game. ratings / placements are lists in player order.
+    Returns: list of new ratings, O(players^2) (constant for a fixed roster).
+    """
+    n = len(ratings)
+    if n < 2:
+        return list(ratings)
+    actual = pairwise_scores(placements)
+    expected = [0.0] * n
+    for i, j in itertools.combinations(range(n), 2):
+        e = expected_score(ratings[i], ratings[j])
+        expected[i] += e
+        expected[j] += 1.0 - e
+    step = k / (n - 1)
+    return [r + step * (a - e) for r, a, e in zip(ratings, actual, expected)]
+
+
+def rate_history(placement, start, k=ELO_K):
+    """
+    Batch mode: ratings after every game of a games x players placement array
+    (season order), starting from `start` (list in player order).
+
+    The actual pairwise scores of every game are computed in one vectorized
+    step. Histories of at least two RATING_SEGMENTs are then rated in
+    segments, all at once (see _rate_segments); shorter ones, and whatever
+    the segments leave unsettled, game by game over plain floats.
+
+    Returns: array("d") of (games + 1) x players checkpoints, row-major,
+    row 0 = start.
+    """
+    import numpy as np
+
+    n_games, n_players = placement.shape
+    checkpoints = array("d", start)
+    if n_players < 2 or not n_games:
+        checkpoints.extend(start * n_games)
+        return checkpoints
+
+    pl = np.asarray(placement)
+    wins = (pl[:, :, None] < pl[:, None, :]).sum(axis=2)
+    draws = (pl[:, :, None] == pl[:, None, :]).sum(axis=2) - 1
+    actual = wins + 0.5 * draws
+    step = k / (n_players - 1)
+
+    ratings = list(start)
+    rated = 0
+    if n_games >= 2 * RATING_SEGMENT:
+        history = _rate_segments(actual, np.array(start, dtype=np.float64), step)
+        checkpoints.frombytes(history.tobytes())
+        rated = len(history)
+        ratings = history[-1].tolist()
+
+    pairs = list(itertools.combinations(range(n_players), 2))
+    extend = checkpoints.extend
+    for first in range(rated, n_games, RATING_SEGMENT):
+        for game_actual in actual[first:first + RATING_SEGMENT].tolist():
+            expected = [0.0] * n_players
+            for i, j in pairs:
+                e = 1.0 / (1.0 + 10.0 ** ((ratings[j] - ratings[i]) / ELO_SCALE))
+                expected[i] += e
+                expected[j] += 1.0 - e
+            ratings = [r + step * (a - e) for r, a, e in zip(ratings, game_actual, expected)]
+            extend(ratings)
+    return checkpoints
+
+
+def expected_scores(ratings):
+    """Each player's expected pairwise score total, over the last axis of a NumPy array."""
+    gap = ratings[..., None, :] - ratings[..., :, None]
+    return (1.0 / (1.0 + 10.0 ** (gap / ELO_SCALE))).sum(axis=-1) - 0.5
+
+
+def _rate_segments(actual, start, step):
+    """
+    Ratings after the first games (games x players float64) from the actual
+    pairwise scores, RATING_SEGMENT games per segment, every segment stepped
+    at once with NumPy.
+
+    Each pass starts every unsettled segment from where the previous pass
+    ended the one before it. Ratings forget where they started (only the
+    gaps between players matter, and those pull together game by game), so
+    the second pass usually settles every segment. A segment is settled once
+    it starts from settled ratings: the first unsettled one always is, and
+    so is each next one whose start matched, to RATING_TOLERANCE, where the
+    one before it ended. When gaps stay too wide to pull together (a pass
+    settles no more than that first segment, or RATING_PASSES run out),
+    the settled games are returned and the caller rates the rest.
+    """
+    import numpy as np
+
+    n_games, n_players = actual.shape
+    n_segments = -(-n_games // RATING_SEGMENT)
+    # games after the last one are all-draw padding, cut off at the end
+    padded = np.full((n_segments * RATING_SEGMENT, n_players), 0.5 * (n_players - 1))
+    padded[:n_games] = actual
+    blocks = padded.reshape(n_segments, RATING_SEGMENT, n_players)
+
+    history = np.empty_like(blocks)
+    starts = np.tile(start, (n_segments, 1))
+    settled = 0
+    for n_pass in range(RATING_PASSES):
+        done = settled
+        ratings = starts[done:]
+        for g in range(RATING_SEGMENT):
+            ratings = ratings + step * (blocks[done:, g] - expected_scores(ratings))
+            history[done:, g] = ratings
+
+        gaps = np.abs(history[done:-1, -1] - starts[done + 1:]).max(axis=1)
+        missed = np.flatnonzero(gaps > RATING_TOLERANCE)
+        settled = done + 1 + (missed[0] if len(missed) else len(gaps))
+        if settled == n_segments or (n_pass and settled == done + 1):
+            break
+        starts[done + 1:] = history[done:-1, -1]
+    return history.reshape(-1, n_players)[:min(settled * RATING_SEGMENT, n_games)]
+
+
+class RatingHistory:
+    """
+    Elo ratings after every game, kept alongside a StandingsAggregator.
+
+    Holds:
+      checkpoints -> array("d"), row k * P + j = rating of players[j] after
+                     the first k games (row 0 = ELO_START for everyone)
+      game_ids    -> array("i"), game_id of every rated game, season order
+
+    Call sync(standings) after standings.sync(games): games the aggregate
+    appended are rated in O(players) each from its placement column; after
+    the aggregate rebuilds, the whole history is re-rated in batch.
+    """
+
+    def __init__(self, players, start=ELO_START, k=ELO_K):
+        self.players = list(players)
+        self.start = start
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self.checkpoints = array("d", [self.start] * len(self.players))
+        self.game_ids = array("i")
+        self._rebuilds = None
+
+    @property
+    def n_games(self):
+        return len(self.game_ids)
+
+    def rebuild(self, standings):
+        """Re-rate every game the aggregate holds in one batch pass."""
+        n_players = len(self.players)
+        n_games = standings.n_games
+        with perf.stage("ratings"):
+            placement = numpy_slice(standings.columns["placement"])
+            self.checkpoints = rate_history(
+                placement.reshape(n_games, n_players),
+                [self.start] * n_players,
+                self.k,
+            )
+            self.game_ids = array("i", standings.columns["game_id"][::n_players])
+        perf.count("games_rated", n_games)
+        self._rebuilds = standings.rebuilds
+
+    def append(self, placements, game_id):
+        """Rate one more game (placements in player order)."""
+        n_players = len(self.players)
+        current = self.checkpoints[-n_players:].tolist()
+        self.checkpoints.extend(rate_game(current, placements, self.k))
+        self.game_ids.append(game_id)
+
+    def sync(self, standings):
+        """
+        Catch up with the aggregate (which must have the same players).
+        Returns "unchanged", "appended" or "rebuilt".
+        """
+        n = self.n_games
+        if standings.rebuilds != self._rebuilds or standings.n_games < n:
+            self.rebuild(standings)
+            return "rebuilt"
+        if standings.n_games == n:
+            return "unchanged"
+
+        n_players = len(self.players)
+        placement = standings.columns["placement"]
+        game_id = standings.columns["game_id"]
+        with perf.stage("ratings"):
+            for g in range(n, standings.n_games):
+                row = g * n_players
+                self.append(placement[row:row + n_players].tolist(), game_id[row])
+        perf.count("games_rated", standings.n_games - n)
+        return "appended"
+
+    def ratings_at(self, k):
+        """{player: rating} after the first k games (season order)."""
+        k = max(0, min(k, self.n_games))
+        row = k * len(self.players)
+        return {p: self.checkpoints[row + j] for j, p in enumerate(self.players)}
+
+    def ratings_at_game(self, game_id):
+        """{player: rating} right after game_id (or the last game before it)."""
+        return self.ratings_at(bisect.bisect_right(self.game_ids, game_id))
+
+    @property
+    def current(self):
+        return self.ratings_at(self.n_games)
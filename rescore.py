@@ -0,0 +1,88 @@
+# rescore.py
+#
+# Re-score the whole history under any ruleset (scoring.RULESETS) in one
+# vectorized pass, and compare two rulesets side by side. Callers cache the
+# results per (ruleset, data generation); see scoreboard.build_ruleset_*.
+from scoring import RULESETS, DEFAULT_RULESET, get_ruleset, assign_ranks
+from season_engine import compute_season_breakdown, compute_season_consistency
+
+
+def ruleset_tags(games_sorted):
+    """
+    How many games are tagged with each ruleset id.
+    Games saved before rulesets were versioned count as DEFAULT_RULESET.
+    """
+    if hasattr(games_sorted, "ruleset_counts"):
+        return games_sorted.ruleset_counts(default=DEFAULT_RULESET)
+
+    counts = {}
+    for g in games_sorted:
+        ruleset_id = g.get("ruleset", DEFAULT_RULESET)
+        counts[ruleset_id] = counts.get(ruleset_id, 0) + 1
+    return counts
+
+
+def rescore_season(season, players, ruleset_id):
+    """
+    Standings for the whole season (load_season_arrays output) as if every
+    game had been played under ruleset_id.
+
+    Returns the same shape as StandingsAggregator.standings_at():
+      {"n_games", "base_totals", "consistency_totals", "final_totals",
+       "wins", "podiums", "ranks"}
+    """
+    rules = get_ruleset(ruleset_id)
+    placement = season["placement"]
+
+    breakdown = compute_season_breakdown(season, rules)
+    consistency = compute_season_consistency(placement, rules)
+
+    base = breakdown["base_total"].sum(axis=0)
+    bonus = consistency.sum(axis=0)
+    wins = (placement == 1).sum(axis=0)
+    podiums = ((placement >= 1) & (placement <= 3)).sum(axis=0)
+
+    final = {p: int(base[j] + bonus[j]) for j, p in enumerate(players)}
+    return {
+        "n_games": int(placement.shape[0]),
+        "base_totals": {p: int(base[j]) for j, p in enumerate(players)},
+        "consistency_totals": {p: int(bonus[j]) for j, p in enumerate(players)},
+        "final_totals": final,
+        "wins": {p: int(wins[j]) for j, p in enumerate(players)},
+        "podiums": {p: int(podiums[j]) for j, p in enumerate(players)},
+        "ranks": assign_ranks(final),
+    }
+
+
+def compare_rulesets(standings_a, standings_b, players):
+    """
+    Side-by-side rows for two rescore_season() results.
+
+    Returns: [{"Player", "Rank A", "Total A", "Rank B", "Total B",
+               "Δ Total", "Δ Rank"}, ...] sorted by rank under ruleset B.
+    """
+    rows = []
+    for p in players:
+        total_a = standings_a["final_totals"][p]
+        total_b = standings_b["final_totals"][p]
+        rank_a = standings_a["ranks"][p]
+        rank_b = standings_b["ranks"][p]
+        rows.append(
+            {
+                "Player": p,
+                "Rank A": rank_a,
+                "Total A": total_a,
+                "Rank B": rank_b,
+                "Total B": total_b,
+                "Δ Total": total_b - total_a,
+                # positive = climbs under ruleset B
+                "Δ Rank": rank_a - rank_b,
+            }
+        )
+    return sorted(rows, key=lambda row: (row["Rank B"], row["Player"]))
+
+
+def ruleset_choices():
+    """(id, name) of every known ruleset, default first."""
+    ids = [DEFAULT_RULESET] + sorted(r for r in RULESETS if r != DEFAULT_RULESET)
+    return [(r, RULESETS[r]["name"]) for r in ids]
@@ -1,75 +1,19 @@
 # score_calculator.py
 import streamlit as st
 
-# ========= RULESET (single-game scoring) =========
-# 1. Placement: 1st 8, 2nd 6, 3rd 4, 4th 2
-PLACEMENT_POINTS = {1: 8, 2: 6, 3: 4, 4: 2}
-
-# 2. Bonus Stars: +2 per star
-BONUS_STAR_POINTS = 2
-
-# 3. Coins:
-#    - +2 for most coins
-#    - -1 for least coins
-#    - +1 per 30 coins, max +3
-COIN_THRESHOLD_POINTS = 1
-COIN_THRESHOLD = 30
-COIN_THRESHOLD_MAX = 3
-
-
-def compute_game_points(game, players):
-    """
-    Compute total points per player for THIS game only.
-
-    game["results"][player]:
-      {
-        "placement": int,
-        "bonus_stars": int,
-        "coins": int,
-        "most_items_used": bool,
-        "most_spaces_travelled": bool,
-      }
-    """
-    results = game["results"]
-    points = {p: 0 for p in players}
-
-    # --- Placement + bonus stars + coin thresholds ---
-    for p in players:
-        r = results[p]
-
-        placement = int(r["placement"])
-        points[p] += PLACEMENT_POINTS.get(placement, 0)
-
-        bonus_stars = int(r["bonus_stars"])
-        points[p] += bonus_stars * BONUS_STAR_POINTS
-
-        coins = int(r["coins"])
-        threshold_bonus = min(coins // COIN_THRESHOLD, COIN_THRESHOLD_MAX)
-        points[p] += threshold_bonus * COIN_THRESHOLD_POINTS
-
-    # --- Most / least coins (from coin values) ---
-    coin_values = {p: int(results[p]["coins"]) for p in players}
-    max_coins = max(coin_values.values())
-    min_coins = min(coin_values.values())
-
-    # Most coins: +2 (ties allowed)
-    for p in players:
-        if coin_values[p] == max_coins and max_coins > 0:
-            points[p] += 2
-
-    # Least coins: -1 (ties allowed)
-    for p in players:
-        if coin_values[p] == min_coins:
-            points[p] -= 1
-
-    # --- Items & movement via single-winner flags ---
-    for p in players:
-        if results[p].get("most_items_used", False):
-            points[p] += 1
-        if results[p].get("most_spaces_travelled", False):
-            points[p] += 1
-
-    return points
+from shared_store import get_shared_season, refresh_session_views
+
+from scoring import (  # re-exported: rules used to live here
+    PLACEMENT_POINTS,
+    BONUS_STAR_POINTS,
+    COIN_THRESHOLD_POINTS,
+    COIN_THRESHOLD,
+    COIN_THRESHOLD_MAX,
+    MAX_BONUS_STARS,
+    MAX_COINS,
+    DEFAULT_RULESET,
+    compute_game_points,
+)
 
 
 def score_calculator_page(players):
@@ -96,7 +40,7 @@ def score_calculator_page(players):
             bonus_stars = st.number_input(
                 "Bonus stars",
                 min_value=0,
-                max_value=10,
+                max_value=MAX_BONUS_STARS,
                 step=1,
                 key=f"{player}_bonus_{game_id}",
             )
@@ -104,7 +48,7 @@ def score_calculator_page(players):
             coins = st.number_input(
                 "Coins",
                 min_value=0,
-                max_value=999,
+                max_value=MAX_COINS,
                 step=1,
                 key=f"{player}_coins_{game_id}",
             )
@@ -150,13 +94,22 @@ def score_calculator_page(players):
         game = {
             "game_id": game_id,
             "results": raw_results,
+            "ruleset": DEFAULT_RULESET,
         }
 
         game_points = compute_game_points(game, players)
         game["points"] = game_points
 
-        st.session_state.games.append(game)
-        st.session_state.next_game_id += 1
+        # Publish to every session (written to disk in the background), then
+        # pick up the new view. The store assigns the final game_id: another
+        # scorekeeper may have taken the one shown above.
+        get_shared_season().append_game(game)
+        game_id = game["game_id"]
+        refresh_session_views()
+
+        # O(players) update of the running standings
+        if "standings" in st.session_state:
+            st.session_state.standings.sync(st.session_state.games)
 
         st.success(f"Game {game_id} saved.")
         st.write("Points for this game:")
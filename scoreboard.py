@@ -1,264 +1,471 @@
 # scoreboard.py
 import streamlit as st
+import numpy as np
 import pandas as pd
 
-
-
-from score_calculator import (
+import perf
+import storage
+
+from clinch import clinch_status
+from frame_cache import get_frame_cache, frame_key
+from game_table import numpy_slice
+from head_to_head import RULE_GROUPS
+from rescore import rescore_season, compare_rulesets, ruleset_choices, ruleset_tags
+from season_engine import load_season_arrays
+from shared_store import get_shared_season
+from standings import standings_rows  # re-exported: used to live here
+from scoring import (  # re-exported: breakdown & ranking used to live here
     compute_game_points,
+    compute_game_points_breakdown,
+    assign_ranks,
     PLACEMENT_POINTS,
     BONUS_STAR_POINTS,
     COIN_THRESHOLD_POINTS,
     COIN_THRESHOLD,
     COIN_THRESHOLD_MAX,
+    SEASON_GAMES,
 )
-from consistency import compute_consistency_bonuses
 
+# Seconds the SQL standings wait for queued saves to reach the database
+# before falling back to the in-memory aggregate
+SQL_FLUSH_TIMEOUT = 1.0
+
+# Seed of the championship odds (the same data gives the same odds)
+ODDS_SEED = 0
 
-def compute_game_points_breakdown(game, players):
+
+def sql_standings_ready():
     """
-    Return a detailed breakdown of points per rule, per player, for ONE game.
-
-    Returns:
-      breakdown[player] = {
-          "placement_pts": int,
-          "bonus_star_pts": int,
-          "coin_threshold_pts": int,
-          "coin_most_pts": int,
-          "coin_least_pts": int,
-          "items_pts": int,
-          "spaces_pts": int,
-          "base_total": int,
-      }
+    True when the overall standings can be read from SQL: the SQLite backend
+    is selected and the write-behind queue has reached the database.
     """
-    results = game["results"]
-    breakdown = {p: {} for p in players}
+    if storage.STORAGE_BACKEND != "sqlite":
+        return False
+    return get_shared_season().writer.flush(SQL_FLUSH_TIMEOUT)
 
-    # Raw coins for most/least logic
-    coin_values = {p: int(results[p]["coins"]) for p in players}
-    max_coins = max(coin_values.values())
-    min_coins = min(coin_values.values())
 
-    for p in players:
-        r = results[p]
-
-        # Placement
-        placement = int(r["placement"])
-        placement_pts = PLACEMENT_POINTS.get(placement, 0)
-
-        # Bonus stars
-        bonus_stars = int(r["bonus_stars"])
-        bonus_star_pts = bonus_stars * BONUS_STAR_POINTS
-
-        # Coin threshold
-        coins = int(r["coins"])
-        threshold_units = min(coins // COIN_THRESHOLD, COIN_THRESHOLD_MAX)
-        coin_threshold_pts = threshold_units * COIN_THRESHOLD_POINTS
-
-        # Most / least coins
-        coin_most_pts = 0
-        coin_least_pts = 0
-        if coin_values[p] == max_coins and max_coins > 0:
-            coin_most_pts = 2
-        if coin_values[p] == min_coins:
-            coin_least_pts = -1
-
-        # Items & spaces
-        items_pts = 1 if r.get("most_items_used", False) else 0
-        spaces_pts = 1 if r.get("most_spaces_travelled", False) else 0
-
-        base_total = (
-            placement_pts
-            + bonus_star_pts
-            + coin_threshold_pts
-            + coin_most_pts
-            + coin_least_pts
-            + items_pts
-            + spaces_pts
-        )
+def build_cumulative_chart_df(standings, players, series=None):
+    """
+    Running totals per player (index = Game #), read from the aggregator's
+    prefix sums (base points + consistency). Pass a synced
+    chart_series.CumulativeSeries to get only its downsampled games
+    (bucket lows / highs and every lead change) instead of every game.
+    Returns None when there are no games.
+    """
+    if standings.n_games == 0:
+        return None
+
+    if series is None:
+        game_ids = standings.game_ids
+        totals = {p: standings.running_totals(p) for p in players}
+    else:
+        game_ids, totals = series.frame(standings)
+    return pd.DataFrame(
+        {p: totals[p] for p in players},
+        index=pd.Index(game_ids, name="Game"),
+    )
 
-        breakdown[p] = {
-            "placement_pts": placement_pts,
-            "bonus_star_pts": bonus_star_pts,
-            "coin_threshold_pts": coin_threshold_pts,
-            "coin_most_pts": coin_most_pts,
-            "coin_least_pts": coin_least_pts,
-            "items_pts": items_pts,
-            "spaces_pts": spaces_pts,
-            "base_total": base_total,
-        }
 
-    return breakdown
+def build_streamlit_cumulative_chart(standings, players, df=None):
+    """
+    Builds a cumulative points line chart using Streamlit native charts.
+    X = Game #
+    Y = Total cumulative points
+
+    Pass a prebuilt (e.g. cached) frame as df to skip rebuilding it.
+    """
+    if df is None:
+        df = build_cumulative_chart_df(standings, players)
+
+    if df is None:
+        st.info("No games available for chart yet.")
+        return
+
+    st.subheader("Points Progression (Line Graph)")
+    st.line_chart(df)
 
 
-def assign_ranks(total_points_by_player):
+def build_sql_standings_rows(players):
     """
-    Given a dict {player: total_points}, return dict {player: rank} with ties.
-    Uses standard competition ranking (1,2,2,4).
+    Standings rows computed by the SQLite backend: wins, podiums and rule sums
+    via SQL aggregates, consistency from the placement column only.
     """
-    # Sort players by total points (desc)
-    sorted_players = sorted(
-        total_points_by_player.items(), key=lambda x: x[1], reverse=True
-    )
+    import sqlite_storage
 
-    ranks = {}
-    last_points = None
-    last_rank = 0
+    aggregates = sqlite_storage.player_aggregates(players)
+    consistency_totals = sqlite_storage.consistency_totals(players)
 
-    for idx, (player, pts) in enumerate(sorted_players, start=1):
-        if pts != last_points:
-            rank = idx
-            last_rank = rank
-            last_points = pts
-        else:
-            rank = last_rank
+    final_totals = {
+        p: aggregates[p]["base_total"] + consistency_totals[p] for p in players
+    }
+    ranks = assign_ranks(final_totals)
 
-        ranks[player] = rank
+    return [
+        {
+            "Rank": ranks[p],
+            "Player": p,
+            "Wins": aggregates[p]["wins"],
+            "Podiums": aggregates[p]["podiums"],
+            "Base Points": aggregates[p]["base_total"],
+            "Consistency Bonus": consistency_totals[p],
+            "Total Points": final_totals[p],
+        }
+        for p in players
+    ]
 
-    return ranks
 
-def build_streamlit_cumulative_chart(games_sorted, players):
+def build_standings_df(standings, players, k=None, sql=False):
     """
-    Builds a cumulative points line chart using Streamlit native charts.
-    X = Game #
-    Y = Total cumulative points
+    Overall standings table from a StandingsAggregator, or with sql=True from
+    the SQLite backend (only once every save is flushed to it, see
+    sql_standings_ready). Pass k for the standings as of game k (always read
+    from the aggregator).
     """
+    if k is None and sql:
+        # aggregates pushed down into SQL, straight from the database
+        rows = build_sql_standings_rows(players)
+    else:
+        snapshot = standings.standings_at(standings.n_games if k is None else k)
+        rows = standings_rows(snapshot, players)
+
+    return (
+        pd.DataFrame(rows)
+        .sort_values(["Rank", "Player"])
+        .reset_index(drop=True)
+    )
 
-    # Initialize running totals
-    running_totals = {p: 0 for p in players}
-    chart_rows = []
 
-    for g in games_sorted:
-        game_id = g["game_id"]
-        game_points = g["points"]  # already computed when game was saved
+def build_ratings_df(ratings, players):
+    """
+    Elo table: current rating, change in the last game and season peak,
+    read from the rating checkpoints. Sorted best first.
+    """
+    n_players = len(ratings.players)
+    history = numpy_slice(ratings.checkpoints).reshape(-1, n_players)
+    last = history[-1]
+    change = last - history[-2] if len(history) > 1 else np.zeros(n_players)
+    peak = history.max(axis=0)
 
-        row = {"Game": game_id}
-        for p in players:
-            running_totals[p] += int(game_points.get(p, 0))
-            row[p] = running_totals[p]
+    rows = []
+    for p in players:
+        j = ratings.players.index(p)
+        rows.append({
+            "Player": p,
+            "Rating": round(float(last[j])),
+            "Δ last game": round(float(change[j]), 1),
+            "Peak": round(float(peak[j])),
+        })
+    return (
+        pd.DataFrame(rows)
+        .sort_values(["Rating", "Player"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
 
-        chart_rows.append(row)
 
-    if not chart_rows:
-        st.info("No games available for chart yet.")
-        return
+# Head-to-head view: label -> HeadToHead.matrix() stat
+HEAD_TO_HEAD_STATS = dict(
+    {"Finished above (%)": "above", "Avg point margin": "total"},
+    **{f"Avg {group.lower()} margin": group for group in RULE_GROUPS},
+)
 
-    df = pd.DataFrame(chart_rows).set_index("Game")
 
-    st.subheader("Points Progression (Line Graph)")
-    st.line_chart(df)
+def build_head_to_head_df(head_to_head, players, stat):
+    """
+    Players x players rivalry table for one HEAD_TO_HEAD_STATS label:
+    row player against column player, over the games both played.
+    """
+    values = head_to_head.matrix(HEAD_TO_HEAD_STATS[stat])
+    if HEAD_TO_HEAD_STATS[stat] == "above":
+        values = values * 100
+    order = [head_to_head.players.index(p) for p in players]
+    return pd.DataFrame(
+        values[np.ix_(order, order)].round(1),
+        index=pd.Index(players, name="Player"),
+        columns=players,
+    )
 
 
-def scoreboard_page(players):
-    st.header("Scoreboard")
+# Breakdown table headers, by standings.BREAKDOWN_SORT_KEYS name
+BREAKDOWN_LABELS = {
+    "game_id": "Game ID",
+    "player": "Player",
+    "placement": "Placement",
+    "placement_pts": "Placement Pts",
+    "bonus_star_pts": "Bonus Star Pts",
+    "coin_threshold_pts": "Coin Threshold Pts",
+    "coin_most_pts": "Most Coins Pts",
+    "coin_least_pts": "Least Coins Pts",
+    "items_pts": "Items Pts",
+    "spaces_pts": "Spaces Pts",
+    "base_total": "Base Total (this game)",
+    "consistency": "Consistency Bonus (this game)",
+    "total": "Total Pts (this game)",
+}
+
+# Rows per breakdown page
+BREAKDOWN_PAGE_SIZES = [50, 100, 250, 1000]
+
+
+def build_breakdown_df(standings, players=None, game_ids=None, sort=None,
+                       descending=False, offset=0, limit=None):
+    """
+    Per-game breakdown by rule (one row per game per player), incl. consistency.
 
-    games = st.session_state.games
+    Filtering, sorting and paging run on the aggregate's columns
+    (StandingsAggregator.breakdown_page); only the requested rows become a
+    DataFrame. The defaults give the whole table by Game ID, then Player.
+    """
+    _, page = standings.breakdown_page(players, game_ids, sort, descending, offset, limit)
+    page["player"] = [standings.players[j] for j in page["player"]]
+    return pd.DataFrame({label: page[name] for name, label in BREAKDOWN_LABELS.items()})
+
+
+def breakdown_table(standings, players, cache):
+    """Breakdown filters, sort and pager; renders one page of rows."""
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        shown = st.multiselect("Players", players, default=players, key="breakdown_players")
+    # empty = open end, so new games show up without touching the filter
+    with c2:
+        first = st.number_input("From Game ID", value=None, step=1, placeholder="first",
+                                key="breakdown_first")
+    with c3:
+        last = st.number_input("To Game ID", value=None, step=1, placeholder="last",
+                               key="breakdown_last")
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        sort = st.selectbox(
+            "Sort by",
+            [None] + list(BREAKDOWN_LABELS),
+            format_func=lambda name: "Game ID, Player" if name is None else BREAKDOWN_LABELS[name],
+            key="breakdown_sort",
+        )
+    with c2:
+        descending = st.checkbox("Descending", key="breakdown_descending")
+    with c3:
+        page_size = st.selectbox("Rows per page", BREAKDOWN_PAGE_SIZES, key="breakdown_page_size")
+
+    query = (tuple(shown), (first, last), sort, descending)
+    n_rows, _ = standings.breakdown_page(*query, limit=0)
+    n_pages = max(-(-n_rows // page_size), 1)
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1,
+                           key="breakdown_page")
+    offset = (min(page, n_pages) - 1) * page_size
+
+    with perf.stage("dataframes"):
+        breakdown_df = cache.get_or_build(
+            frame_key("breakdown_df", players, query, offset, page_size),
+            lambda: build_breakdown_df(standings, *query, offset=offset, limit=page_size),
+        )
+    st.caption(
+        f"Rows {offset + 1 if n_rows else 0}–{offset + len(breakdown_df)} of {n_rows} "
+        f"(page {min(page, n_pages)} of {n_pages})"
+    )
+    st.dataframe(breakdown_df, use_container_width=True, hide_index=True)
 
-    if not games:
-        st.info("No games recorded yet. Add a game on the Calculate Scores page.")
-        return
 
-    # ---------- 1. Base points & per-rule breakdown ----------
-    base_totals = {p: 0 for p in players}
-    per_game_rows = []
+@st.cache_resource
+def get_simulation_pool():
+    """
+    The process-wide worker pool for championship odds (simulator.start_pool),
+    started on the first render of the odds section, ahead of any click.
+    """
+    from simulator import start_pool
 
-    # Win & podium counters
-    wins = {p: 0 for p in players}
-    podiums = {p: 0 for p in players}
+    return start_pool()
 
-    # Ensure games are in order
-    games_sorted = sorted(games, key=lambda g: g.get("game_id", 0))
 
-    build_streamlit_cumulative_chart(games_sorted, players)
+def build_odds_df(standings, players, seed=ODDS_SEED):
+    """
+    Rank probabilities (in %) from simulator.simulate_championship.
+    Returns: (DataFrame, samples) — the sample count depends on how many
+    batches fit in the time budget.
+    """
+    from simulator import simulate_championship
 
+    result = simulate_championship(standings, seed=seed, pool=get_simulation_pool())
+    ordinals = ["1st", "2nd", "3rd"] + [f"{k}th" for k in range(4, len(players) + 1)]
+    rows = []
+    for p in players:
+        row = {"Player": p}
+        for ordinal, prob in zip(ordinals, result["rank_probabilities"][p]):
+            row[f"P({ordinal}) %"] = round(100.0 * prob, 1)
+        rows.append(row)
+
+    df = (
+        pd.DataFrame(rows)
+        .sort_values(["P(1st) %", "Player"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
+    return df, result["samples"]
 
 
-    for g in games_sorted:
-        game_id = g["game_id"]
-        results = g["results"]
+def ruleset_comparison(standings, players, cache):
+    """Two ruleset pickers and the season re-scored under each, side by side."""
+    choices = dict(ruleset_choices())
+    ids = list(choices)
 
-        # Detailed rule breakdown for this game
-        breakdown = compute_game_points_breakdown(g, players)
+    col_a, col_b = st.columns(2)
+    ruleset_a = col_a.selectbox("Ruleset A", ids, index=0, format_func=choices.get)
+    ruleset_b = col_b.selectbox(
+        "Ruleset B", ids, index=min(1, len(ids) - 1), format_func=choices.get
+    )
 
-        for p in players:
-            pl = int(results[p]["placement"])
-            br = breakdown[p]
+    tags = ruleset_tags(standings.games_sorted)
+    st.caption(
+        "Games saved under: "
+        + ", ".join(f"{choices.get(r, r)} ({n})" for r, n in sorted(tags.items()))
+    )
 
-            base_totals[p] += br["base_total"]
+    # Season arrays are loaded at most once per render, only on a cache miss
+    season = []
+
+    def load():
+        if not season:
+            season.append(load_season_arrays(standings.games_sorted, players))
+        return season[0]
+
+    with perf.stage("dataframes"):
+        rescored = {
+            r: cache.get_or_build(
+                frame_key("rescore", players, r),
+                lambda r=r: rescore_season(load(), players, r),
+            )
+            for r in (ruleset_a, ruleset_b)
+        }
 
-            # Wins & podiums
-            if pl == 1:
-                wins[p] += 1
-            if pl in (1, 2, 3):
-                podiums[p] += 1
+    st.dataframe(
+        pd.DataFrame(compare_rulesets(rescored[ruleset_a], rescored[ruleset_b], players)),
+        use_container_width=True,
+    )
 
-            row = {
-                "Game ID": game_id,
-                "Player": p,
-                "Placement": pl,
-                "Placement Pts": br["placement_pts"],
-                "Bonus Star Pts": br["bonus_star_pts"],
-                "Coin Threshold Pts": br["coin_threshold_pts"],
-                "Most Coins Pts": br["coin_most_pts"],
-                "Least Coins Pts": br["coin_least_pts"],
-                "Items Pts": br["items_pts"],
-                "Spaces Pts": br["spaces_pts"],
-                "Base Total (this game)": br["base_total"],
-            }
-            per_game_rows.append(row)
 
-    # ---------- 2. Consistency bonuses ----------
-    consistency_totals, per_game_consistency = compute_consistency_bonuses(
-        games_sorted, players
-    )
+def scoreboard_page(players):
+    st.header("Scoreboard")
 
-    # ---------- 3. Final totals & ranks ----------
-    final_totals = {
-        p: base_totals[p] + consistency_totals.get(p, 0) for p in players
-    }
+    games = st.session_state.games
 
-    ranks = assign_ranks(final_totals)
+    if not games:
+        st.info("No games recorded yet. Add a game on the Calculate Scores page.")
+        return
 
-    standings_rows = []
-    for p in players:
-        standings_rows.append(
-            {
-                "Rank": ranks[p],
-                "Player": p,
-                "Wins": wins[p],
-                "Podiums": podiums[p],
-                "Base Points": base_totals[p],
-                "Consistency Bonus": consistency_totals.get(p, 0),
-                "Total Points": final_totals[p],
-            }
+    # Running aggregate: folds in appended games, rebuilds on edits/deletes
+    standings = st.session_state.standings
+    standings.sync(games)
+    ratings = st.session_state.ratings
+    ratings.sync(standings)
+    head_to_head = st.session_state.head_to_head
+    head_to_head.sync(standings)
+    cumulative = st.session_state.cumulative
+    cumulative.sync(standings)
+
+    cache = get_frame_cache()
+
+    with perf.stage("dataframes"):
+        chart_df = cache.get_or_build(
+            frame_key("chart_df", players),
+            lambda: build_cumulative_chart_df(standings, players, cumulative),
+        )
+    with perf.stage("chart"):
+        build_streamlit_cumulative_chart(standings, players, chart_df)
+    if chart_df is not None and len(chart_df) < standings.n_games:
+        st.caption(
+            f"Showing {len(chart_df)} of {standings.n_games} games: each stretch's "
+            "lows and highs, and every lead change."
         )
 
-    standings_df = (
-        pd.DataFrame(standings_rows)
-        .sort_values(["Rank", "Player"])
-        .reset_index(drop=True)
-    )
+    # ---------- 1–3. Totals, consistency & ranks ----------
+    with perf.stage("dataframes"):
+        # SQL only sees saves the writer has flushed; its count keys the frame
+        sql = sql_standings_ready()
+        flushed = get_shared_season().writer.flushed if sql else None
+        standings_df = cache.get_or_build(
+            frame_key("standings_df", players, sql, flushed),
+            lambda: build_standings_df(standings, players, sql=sql),
+        )
 
     st.subheader("Overall Standings")
     st.dataframe(standings_df, use_container_width=True)
 
+    # ---------- Scrub through the season (point-in-time standings) ----------
+    if standings.n_games >= 2:
+        with st.expander("⏪ Scrub through the season"):
+            k = st.slider(
+                "Standings after game #",
+                min_value=1,
+                max_value=standings.n_games,
+                value=standings.n_games,
+            )
+            game_id = standings.standings_at(k)["game_id"]
+            st.caption(f"As of Game ID {game_id}")
+            st.dataframe(
+                build_standings_df(standings, players, k=k),
+                use_container_width=True,
+            )
+
+    # ---------- Skill ratings (Elo over every game's placements) ----------
+    with st.expander("📈 Skill ratings (Elo)"):
+        with perf.stage("dataframes"):
+            ratings_df = cache.get_or_build(
+                frame_key("ratings_df", players),
+                lambda: build_ratings_df(ratings, players),
+            )
+        st.caption(
+            "Every game counts as head-to-head results between all its players; "
+            "the better placement wins."
+        )
+        st.dataframe(ratings_df, use_container_width=True)
+
+    # ---------- Head-to-head (players x players rivalry matrix) ----------
+    with st.expander("🤝 Head-to-head"):
+        stat = st.selectbox("Compare", list(HEAD_TO_HEAD_STATS))
+        with perf.stage("dataframes"):
+            head_to_head_df = cache.get_or_build(
+                frame_key("head_to_head_df", players, stat),
+                lambda: build_head_to_head_df(head_to_head, players, stat),
+            )
+        st.caption("Row player against column player, over the games both played.")
+        st.dataframe(head_to_head_df, use_container_width=True)
+
+    # ---------- Championship odds (Monte Carlo over the remaining games) ----------
+    remaining = SEASON_GAMES - standings.n_games
+    if remaining > 0:
+        with st.expander(f"Who can still win? ({remaining} games left)"):
+            # Exact answers first, then the odds
+            status = clinch_status(standings)
+            clinched = [p for p in players if status[p] == "clinched"]
+            eliminated = [p for p in players if status[p] == "eliminated"]
+            if clinched:
+                st.success(f"🏆 Clinched 1st place: {', '.join(clinched)}")
+            if eliminated:
+                st.caption(f"Mathematically eliminated from 1st: {', '.join(eliminated)}")
+            if not clinched and not eliminated:
+                st.caption("Nobody has clinched or been eliminated yet.")
+
+            # workers start while the page is read, not on the click
+            get_simulation_pool()
+            if st.button("🎲 Simulate rest of season"):
+                odds_df, samples = cache.get_or_build(
+                    frame_key("odds_df", players, ODDS_SEED),
+                    lambda: build_odds_df(standings, players),
+                )
+                st.caption(f"{samples:,} simulated seasons")
+                st.dataframe(odds_df, use_container_width=True)
+
+    # ---------- Ruleset comparison (whole history re-scored) ----------
+    with st.expander("🔁 Compare rulesets"):
+        ruleset_comparison(standings, players, cache)
+
     # ---------- 4. Per-game breakdown by rule (including consistency) ----------
     st.subheader("Per-game breakdown by rule")
 
-    # Attach per-game consistency bonus & final game total
-    for row in per_game_rows:
-        gid = row["Game ID"]
-        p = row["Player"]
-        cb = per_game_consistency.get(p, {}).get(gid, 0)
-        row["Consistency Bonus (this game)"] = cb
-        row["Total Pts (this game)"] = row["Base Total (this game)"] + cb
-
-    breakdown_df = pd.DataFrame(per_game_rows).sort_values(
-        ["Game ID", "Player"]
-    )
-    st.dataframe(breakdown_df, use_container_width=True)
+    breakdown_table(standings, players, cache)
 
     # Expose standings for summary page
     st.session_state.current_standings = standings_df
+    st.session_state.current_standings_game_id = standings.standings_at(standings.n_games)[
+        "game_id"
+    ]
 
 
@@ -0,0 +1,255 @@
+# scoring.py
+#
+# Pure-Python scoring rules: no Streamlit / pandas / NumPy imports here, so
+# scripts and the CLI can use the rules without loading the web UI.
+from consistency import (
+    BACK_TO_BACK_TOP2_POINTS,
+    THREE_STRAIGHT_TOP2_POINTS,
+    NO_FOURTH_POINTS,
+    NO_FOURTH_BLOCK,
+)
+
+# ========= RULESET (single-game scoring) =========
+# 1. Placement: 1st 8, 2nd 6, 3rd 4, 4th 2
+PLACEMENT_POINTS = {1: 8, 2: 6, 3: 4, 4: 2}
+
+# 2. Bonus Stars: +2 per star
+BONUS_STAR_POINTS = 2
+
+# 3. Coins:
+#    - +2 for most coins
+#    - -1 for least coins
+#    - +1 per 30 coins, max +3
+COIN_MOST_POINTS = 2
+COIN_LEAST_POINTS = -1
+COIN_THRESHOLD_POINTS = 1
+COIN_THRESHOLD = 30
+COIN_THRESHOLD_MAX = 3
+
+# 4. Most items used / most spaces travelled: +1 each
+ITEMS_POINTS = 1
+SPACES_POINTS = 1
+
+# ========= SEASON FORMAT =========
+# The championship is played over 10 games
+SEASON_GAMES = 10
+
+# ========= INPUT BOUNDS (score entry form) =========
+MAX_BONUS_STARS = 10
+MAX_COINS = 999
+
+# ========= RULESETS (versioned) =========
+# Every saved game is tagged with the id of the ruleset its frozen "points"
+# were computed with; rescore.py can re-score the whole history under any of
+# them. The constants above (and in consistency.py) are the current ruleset;
+# scoring reads every value from here, by each game's tag.
+RULESETS = {
+    "2025": {
+        "id": "2025",
+        "name": "2025 championship",
+        "placement_points": PLACEMENT_POINTS,
+        "bonus_star_points": BONUS_STAR_POINTS,
+        "coin_threshold_points": COIN_THRESHOLD_POINTS,
+        "coin_threshold": COIN_THRESHOLD,
+        "coin_threshold_max": COIN_THRESHOLD_MAX,
+        "coin_most_points": COIN_MOST_POINTS,
+        "coin_least_points": COIN_LEAST_POINTS,
+        "items_points": ITEMS_POINTS,
+        "spaces_points": SPACES_POINTS,
+        "back_to_back_top2_points": BACK_TO_BACK_TOP2_POINTS,
+        "three_straight_top2_points": THREE_STRAIGHT_TOP2_POINTS,
+        "no_fourth_points": NO_FOURTH_POINTS,
+        "no_fourth_block": NO_FOURTH_BLOCK,
+    },
+}
+# Placement 10 / 6 / 3 / 0, as in the README; everything else unchanged
+RULESETS["classic"] = dict(
+    RULESETS["2025"],
+    id="classic",
+    name="Classic (README)",
+    placement_points={1: 10, 2: 6, 3: 3, 4: 0},
+)
+
+DEFAULT_RULESET = "2025"
+
+
+def get_ruleset(ruleset_id=None):
+    """The ruleset dict for ruleset_id (None -> DEFAULT_RULESET)."""
+    ruleset_id = DEFAULT_RULESET if ruleset_id is None else ruleset_id
+    if ruleset_id not in RULESETS:
+        raise ValueError(f"unknown ruleset {ruleset_id!r}")
+    return RULESETS[ruleset_id]
+
+
+def compute_game_points(game, players, ruleset=None):
+    """
+    Compute total points per player for THIS game only, under `ruleset`
+    (a RULESETS dict; default: the game's own "ruleset" tag).
+
+    game["results"][player]:
+      {
+        "placement": int,
+        "bonus_stars": int,
+        "coins": int,
+        "most_items_used": bool,
+        "most_spaces_travelled": bool,
+      }
+    """
+    rules = ruleset if ruleset is not None else get_ruleset(game.get("ruleset"))
+    results = game["results"]
+    points = {p: 0 for p in players}
+
+    # --- Placement + bonus stars + coin thresholds ---
+    for p in players:
+        r = results[p]
+
+        placement = int(r["placement"])
+        points[p] += rules["placement_points"].get(placement, 0)
+
+        bonus_stars = int(r["bonus_stars"])
+        points[p] += bonus_stars * rules["bonus_star_points"]
+
+        coins = int(r["coins"])
+        threshold_bonus = min(coins // rules["coin_threshold"], rules["coin_threshold_max"])
+        points[p] += threshold_bonus * rules["coin_threshold_points"]
+
+    # --- Most / least coins (from coin values) ---
+    coin_values = {p: int(results[p]["coins"]) for p in players}
+    max_coins = max(coin_values.values())
+    min_coins = min(coin_values.values())
+
+    # Most coins (ties allowed)
+    for p in players:
+        if coin_values[p] == max_coins and max_coins > 0:
+            points[p] += rules["coin_most_points"]
+
+    # Least coins (ties allowed)
+    for p in players:
+        if coin_values[p] == min_coins:
+            points[p] += rules["coin_least_points"]
+
+    # --- Items & movement via single-winner flags ---
+    for p in players:
+        if results[p].get("most_items_used", False):
+            points[p] += rules["items_points"]
+        if results[p].get("most_spaces_travelled", False):
+            points[p] += rules["spaces_points"]
+
+    return points
+
+
+# Per-rule columns, in the same order as compute_game_points_breakdown
+RULE_COLUMNS = [
+    "placement_pts",
+    "bonus_star_pts",
+    "coin_threshold_pts",
+    "coin_most_pts",
+    "coin_least_pts",
+    "items_pts",
+    "spaces_pts",
+]
+
+
+def compute_game_points_breakdown(game, players, ruleset=None):
+    """
+    Return a detailed breakdown of points per rule, per player, for ONE game,
+    under `ruleset` (a RULESETS dict; default: the game's own "ruleset" tag).
+
+    Returns:
+      breakdown[player] = {
+          "placement_pts": int,
+          "bonus_star_pts": int,
+          "coin_threshold_pts": int,
+          "coin_most_pts": int,
+          "coin_least_pts": int,
+          "items_pts": int,
+          "spaces_pts": int,
+          "base_total": int,
+      }
+    """
+    rules = ruleset if ruleset is not None else get_ruleset(game.get("ruleset"))
+    results = game["results"]
+    breakdown = {p: {} for p in players}
+
+    # Raw coins for most/least logic
+    coin_values = {p: int(results[p]["coins"]) for p in players}
+    max_coins = max(coin_values.values())
+    min_coins = min(coin_values.values())
+
+    for p in players:
+        r = results[p]
+
+        # Placement
+        placement = int(r["placement"])
+        placement_pts = rules["placement_points"].get(placement, 0)
+
+        # Bonus stars
+        bonus_stars = int(r["bonus_stars"])
+        bonus_star_pts = bonus_stars * rules["bonus_star_points"]
+
+        # Coin threshold
+        coins = int(r["coins"])
+        threshold_units = min(coins // rules["coin_threshold"], rules["coin_threshold_max"])
+        coin_threshold_pts = threshold_units * rules["coin_threshold_points"]
+
+        # Most / least coins
+        coin_most_pts = 0
+        coin_least_pts = 0
+        if coin_values[p] == max_coins and max_coins > 0:
+            coin_most_pts = rules["coin_most_points"]
+        if coin_values[p] == min_coins:
+            coin_least_pts = rules["coin_least_points"]
+
+        # Items & spaces
+        items_pts = rules["items_points"] if r.get("most_items_used", False) else 0
+        spaces_pts = rules["spaces_points"] if r.get("most_spaces_travelled", False) else 0
+
+        base_total = (
+            placement_pts
+            + bonus_star_pts
+            + coin_threshold_pts
+            + coin_most_pts
+            + coin_least_pts
+            + items_pts
+            + spaces_pts
+        )
+
+        breakdown[p] = {
+            "placement_pts": placement_pts,
+            "bonus_star_pts": bonus_star_pts,
+            "coin_threshold_pts": coin_threshold_pts,
+            "coin_most_pts": coin_most_pts,
+            "coin_least_pts": coin_least_pts,
+            "items_pts": items_pts,
+            "spaces_pts": spaces_pts,
+            "base_total": base_total,
+        }
+
+    return breakdown
+
+
+def assign_ranks(total_points_by_player):
+    """
+    Given a dict {player: total_points}, return dict {player: rank} with ties.
+    Uses standard competition ranking (1,2,2,4).
+    """
+    # Sort players by total points (desc)
+    sorted_players = sorted(
+        total_points_by_player.items(), key=lambda x: x[1], reverse=True
+    )
+
+    ranks = {}
+    last_points = None
+    last_rank = 0
+
+    for idx, (player, pts) in enumerate(sorted_players, start=1):
+        if pts != last_points:
+            rank = idx
+            last_rank = rank
+            last_points = pts
+        else:
+            rank = last_rank
+
+        ranks[player] = rank
+
+    return ranks
@@ -0,0 +1,188 @@
+# season_engine.py
+import numpy as np
+
+from scoring import RULE_COLUMNS, get_ruleset
+
+
+def load_season_arrays(games_sorted, players):
+    """
+    Load the whole season into games x players arrays.
+    A game_table view is read straight from its columns (small int dtypes).
+
+    Returns:
+      season = {
+          "game_id": int array (games,),
+          "placement": int array (games, players),
+          "bonus_stars": int array (games, players),
+          "coins": int array (games, players),
+          "most_items_used": bool array (games, players),
+          "most_spaces_travelled": bool array (games, players),
+          "ruleset": int array (games,), index into "rulesets" (-1 = untagged),
+          "rulesets": [ruleset id, ...],
+      }
+    """
+    if hasattr(games_sorted, "season_arrays"):
+        # game_table view: copy the typed columns, no per-game dicts
+        return games_sorted.season_arrays(players)
+
+    n_games = len(games_sorted)
+    n_players = len(players)
+
+    game_id = np.zeros(n_games, dtype=np.int64)
+    placement = np.zeros((n_games, n_players), dtype=np.int64)
+    bonus_stars = np.zeros((n_games, n_players), dtype=np.int64)
+    coins = np.zeros((n_games, n_players), dtype=np.int64)
+    most_items = np.zeros((n_games, n_players), dtype=bool)
+    most_spaces = np.zeros((n_games, n_players), dtype=bool)
+    ruleset = np.full(n_games, -1, dtype=np.int64)
+    rulesets = []
+
+    for i, g in enumerate(games_sorted):
+        game_id[i] = g.get("game_id", 0)
+        ruleset_id = g.get("ruleset")
+        if ruleset_id is not None:
+            if ruleset_id not in rulesets:
+                rulesets.append(ruleset_id)
+            ruleset[i] = rulesets.index(ruleset_id)
+        results = g["results"]
+        for j, p in enumerate(players):
+            r = results[p]
+            placement[i, j] = int(r["placement"])
+            bonus_stars[i, j] = int(r["bonus_stars"])
+            coins[i, j] = int(r["coins"])
+            most_items[i, j] = bool(r.get("most_items_used", False))
+            most_spaces[i, j] = bool(r.get("most_spaces_travelled", False))
+
+    return {
+        "game_id": game_id,
+        "placement": placement,
+        "bonus_stars": bonus_stars,
+        "coins": coins,
+        "most_items_used": most_items,
+        "most_spaces_travelled": most_spaces,
+        "ruleset": ruleset,
+        "rulesets": rulesets,
+    }
+
+
+def compute_season_breakdown(season, ruleset=None):
+    """
+    Score every game of the season in one vectorized pass.
+
+    ruleset: a RULESETS dict to score every game under (re-scoring), or None
+    to score each game under its own "ruleset" tag like compute_game_points /
+    compute_game_points_breakdown (one pass per ruleset in use).
+    Gives the same numbers as those, one games x players array per rule.
+
+    Returns:
+      breakdown = {
+          "placement_pts": int array (games, players),
+          ...
+          "spaces_pts": int array (games, players),
+          "base_total": int array (games, players),
+      }
+    """
+    if ruleset is not None:
+        return _season_breakdown(season, ruleset)
+
+    codes = season.get("ruleset")
+    if codes is None or not len(codes):
+        return _season_breakdown(season, get_ruleset())
+    rulesets = season["rulesets"]
+    by_rules = {}
+    for code in np.unique(codes).tolist():
+        rules = get_ruleset(rulesets[code] if code >= 0 else None)
+        by_rules.setdefault(rules["id"], (rules, []))[1].append(code)
+    if len(by_rules) == 1:
+        (rules, _), = by_rules.values()
+        return _season_breakdown(season, rules)
+
+    # games tagged with different rulesets: score each group, then interleave
+    breakdown = {}
+    for rules, group_codes in by_rules.values():
+        rows = np.flatnonzero(np.isin(codes, group_codes))
+        part = _season_breakdown(
+            {name: season[name][rows] for name in _RULE_INPUTS}, rules
+        )
+        for col, values in part.items():
+            if col not in breakdown:
+                breakdown[col] = np.zeros(season["placement"].shape, dtype=np.int64)
+            breakdown[col][rows] = values
+    return breakdown
+
+
+# season arrays the per-rule points are computed from
+_RULE_INPUTS = ("placement", "bonus_stars", "coins", "most_items_used", "most_spaces_travelled")
+
+
+def _season_breakdown(season, rules):
+    placement = season["placement"]
+    coins = season["coins"]
+
+    # Placement (unknown placements score 0, like PLACEMENT_POINTS.get)
+    placement_points = rules["placement_points"]
+    table = np.zeros(max(placement_points) + 1, dtype=np.int64)
+    for pl, pts in placement_points.items():
+        table[pl] = pts
+    in_table = (placement >= 0) & (placement < len(table))
+    placement_pts = np.where(
+        in_table, table[np.clip(placement, 0, len(table) - 1)], 0
+    )
+
+    # Bonus stars
+    bonus_star_pts = season["bonus_stars"] * rules["bonus_star_points"]
+
+    # Coin threshold
+    threshold_units = np.minimum(coins // rules["coin_threshold"], rules["coin_threshold_max"])
+    coin_threshold_pts = threshold_units * rules["coin_threshold_points"]
+
+    # Most / least coins (ties allowed)
+    max_coins = coins.max(axis=1, keepdims=True)
+    min_coins = coins.min(axis=1, keepdims=True)
+    coin_most_pts = np.where((coins == max_coins) & (max_coins > 0), rules["coin_most_points"], 0)
+    coin_least_pts = np.where(coins == min_coins, rules["coin_least_points"], 0)
+
+    # Items & spaces (single-winner flags)
+    items_pts = season["most_items_used"] * rules["items_points"]
+    spaces_pts = season["most_spaces_travelled"] * rules["spaces_points"]
+
+    breakdown = {
+        "placement_pts": placement_pts,
+        "bonus_star_pts": bonus_star_pts,
+        "coin_threshold_pts": coin_threshold_pts,
+        "coin_most_pts": coin_most_pts,
+        "coin_least_pts": coin_least_pts,
+        "items_pts": items_pts,
+        "spaces_pts": spaces_pts,
+    }
+    breakdown["base_total"] = sum(breakdown[col] for col in RULE_COLUMNS)
+    return breakdown
+
+
+def compute_season_consistency(placement, ruleset=None):
+    """
+    Consistency bonus per game per player, vectorized over the whole season.
+
+    Same rules as ConsistencyTracker (every player placed in every game).
+    Returns: int array (games, players)
+    """
+    rules = ruleset if ruleset is not None else get_ruleset()
+    n_games = placement.shape[0]
+
+    # Top 2 streak length at each game: games since the last non-Top 2 finish
+    idx = np.arange(n_games)[:, None]
+    last_break = np.maximum.accumulate(np.where(placement <= 2, -1, idx), axis=0)
+    streak = idx - last_break
+    bonus = (
+        (streak >= 2) * rules["back_to_back_top2_points"]
+        + (streak >= 3) * rules["three_straight_top2_points"]
+    )
+
+    # No 4th places, checked on the last game of every full block
+    block = rules["no_fourth_block"]
+    n_blocks = n_games // block
+    if n_blocks:
+        fourths = (placement[: n_blocks * block] == 4).reshape(n_blocks, block, -1)
+        bonus[block - 1 :: block][:n_blocks] += (~fourths.any(axis=1)) * rules["no_fourth_points"]
+
+    return bonus
@@ -0,0 +1,159 @@
+# season_file.py
+#
+# Binary columnar copy of the season for fast cold starts. The JSON snapshot
+# (storage.DATA_FILE) stays the source of truth; this file mirrors it and is
+# only used while it still matches the snapshot it was written next to.
+#
+# Layout (little-endian):
+#   0   MAGIC (8 bytes)
+#   8   header length in bytes (uint64)
+#   16  header: UTF-8 JSON, see write_season()
+#   ... fixed-width columns, each starting on an ALIGN-byte boundary, one per
+#       game_table.TABLE_COLUMNS name. Per-player columns are games x players,
+#       row-major, so the player index is the position within the row.
+#
+# open_season() maps the columns with numpy.memmap: nothing is read until a
+# column is used, and the OS pages data in (and out) on demand.
+import json
+import os
+
+import numpy as np
+
+from game_table import GameTable, TABLE_COLUMNS, NUMPY_DTYPES
+
+MAGIC = b"MPSEASN1"
+FORMAT_VERSION = 1
+
+# Column data offsets are multiples of this
+ALIGN = 64
+
+_PRELUDE = 16
+
+
+def _dtype(typecode):
+    return np.dtype(NUMPY_DTYPES[typecode]).newbyteorder("<")
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def file_signature(path):
+    """(inode, size, mtime_ns) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def write_season(path, games, summaries, journal_seq, source=None):
+    """
+    Write a game_table view (plus the summaries) as a season file.
+
+    journal_seq: the last storage event the file covers.
+    source: file_signature() of the snapshot this file mirrors; open_season()
+            refuses the file once the snapshot no longer has that signature.
+
+    Written to a temp file, fsync'd and renamed over path.
+    """
+    table = games.table
+    n_games = len(games)
+
+    columns = {}
+    layout = {}
+    offset = 0
+    for name, (typecode, _) in TABLE_COLUMNS.items():
+        values = np.ascontiguousarray(table.numpy_column(name, n_games), dtype=_dtype(typecode))
+        columns[name] = values
+        layout[name] = {"dtype": values.dtype.str, "offset": offset, "length": len(values)}
+        offset = _aligned(offset + values.nbytes)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "n_games": n_games,
+        "players": table.players,
+        "rulesets": table.rulesets,
+        "sorted_upto": min(table.sorted_upto, n_games),
+        "extras": {str(i): extra for i, extra in table.extras.items() if i < n_games},
+        "summaries": list(summaries),
+        "journal_seq": journal_seq,
+        "source": source,
+        "columns": layout,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _aligned(_PRELUDE + len(header_bytes))
+
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, values in columns.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(values.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def read_header(path):
+    """
+    The header of a season file.
+    Returns: (header, data_start), or None if path is missing or not a season file.
+    """
+    try:
+        with open(path, "rb") as f:
+            prelude = f.read(_PRELUDE)
+            if len(prelude) < _PRELUDE or prelude[:8] != MAGIC:
+                return None
+            header_len = int.from_bytes(prelude[8:], "little")
+            header = json.loads(f.read(header_len))
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != FORMAT_VERSION:
+        return None
+    return header, _aligned(_PRELUDE + header_len)
+
+
+def open_season(path, source=None):
+    """
+    Memory-map a season file.
+
+    source: if given, the file is only used when it was written for a
+            snapshot with this file_signature().
+
+    Returns: (table, summaries, journal_seq) with table a GameTable whose games
+    are backed by the mapped columns, or None if there is no usable file.
+    """
+    found = read_header(path)
+    if found is None:
+        return None
+    header, data_start = found
+    if source is not None and header.get("source") != source:
+        # stale: the snapshot was rewritten since
+        return None
+
+    size = os.path.getsize(path)
+    base = {}
+    for name in TABLE_COLUMNS:
+        spec = header["columns"][name]
+        dtype = np.dtype(spec["dtype"])
+        offset = data_start + spec["offset"]
+        if offset + spec["length"] * dtype.itemsize > size:
+            # truncated file
+            return None
+        if spec["length"]:
+            base[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset,
+                                   shape=(spec["length"],))
+        else:
+            base[name] = np.zeros(0, dtype=dtype)
+
+    table = GameTable.from_columns(
+        header["players"],
+        base,
+        rulesets=header["rulesets"],
+        extras={int(i): extra for i, extra in header["extras"].items()},
+        sorted_upto=header["sorted_upto"],
+    )
+    return table, header["summaries"], int(header["journal_seq"])
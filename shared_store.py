@@ -0,0 +1,264 @@
+# shared_store.py
+import itertools
+import threading
+from collections.abc import Sequence
+
+import streamlit as st
+
+from storage import (
+    StaleDataError,
+    load_table,
+    append_games,
+    append_summary,
+    allocate_ids,
+    data_version,
+    maybe_compact,
+    poll,
+)
+from summary_index import SummaryIndex
+from write_behind import WriteBehind
+
+
+class SeasonView(Sequence):
+    """
+    Read-only view of the first `length` items of a shared, append-only list.
+
+    Cheap to create (no copy); items appended to the shared list later are not
+    visible through an existing view, so a view is a stable snapshot.
+    """
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, items, length):
+        self._items = items
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            return self._items[start:stop:step]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("SeasonView index out of range")
+        return self._items[index]
+
+    def __repr__(self):
+        return f"SeasonView({self._length} items)"
+
+
+class SharedSeason:
+    """
+    One process-wide copy of the season, shared by every browser session.
+
+    generation is bumped on every write; sessions compare it against the
+    generation they last saw to know when to pick up new views.
+
+    Writes are published in memory at once and persisted by a write-behind
+    thread (see write_behind.py); durability() reports how far it has got.
+    Game and summary ids come from storage.allocate_ids, so they are unique
+    across every process sharing the files; poll() picks up what the other
+    processes saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # held while a snapshot is written from views of the table
+        self._compacting = threading.Lock()
+        # games are held as a compact column table (memory-mapped from the
+        # season file when it is current); dicts only at the storage boundary
+        self._games, self._summaries = load_table()
+        self._max_game_id = self._games.max_game_id()
+        self.summary_index = SummaryIndex()
+        self.summary_index.sync(self._summaries)
+        self.generation = 0
+        self.writer = WriteBehind(self._write_events, after_write=self._compact)
+
+    @property
+    def next_game_id(self):
+        """The id the next game will probably get (another writer may take it first)."""
+        return self._max_game_id + 1
+
+    def games_view(self):
+        return self._games.view()
+
+    def summaries_view(self):
+        return SeasonView(self._summaries, len(self._summaries))
+
+    def append_game(self, game):
+        """
+        Give the game the next free game_id (set on the dict), publish it and
+        queue it for persisting; returns the new generation.
+        """
+        with self._lock:
+            game["game_id"] = allocate_ids("game_id", floor=self._max_game_id)
+            self._append_game_locked(game)
+            self._max_game_id = max(self._max_game_id, game["game_id"])
+            self.generation += 1
+            self.writer.submit("game", game)
+            return self.generation
+
+    def _append_game_locked(self, game):
+        if game["results"].keys() <= set(self._games.players):
+            self._games.append(game)
+            return
+        # a new player widens every column in place, under any snapshot
+        # being written from them: wait for it (rare)
+        with self._compacting:
+            self._games.append(game)
+
+    def append_summary(self, summary):
+        """Persist and publish one new summary; returns the new generation."""
+        with self._lock:
+            return self._append_summary_locked(summary)
+
+    def save_summary(self, label, rows, game_id=None):
+        """
+        Encode a standings snapshot against the latest summary (see
+        summary_index), then persist and publish it. Returns the stored record.
+        """
+        with self._lock:
+            summary_id = allocate_ids(
+                "summary_id", floor=self.summary_index.next_summary_id - 1
+            )
+            summary = self.summary_index.encode(
+                label, rows, game_id=game_id, summary_id=summary_id
+            )
+            self._append_summary_locked(summary)
+            return summary
+
+    def _append_summary_locked(self, summary):
+        self._summaries.append(summary)
+        self.summary_index.sync(self._summaries)
+        self.generation += 1
+        self.writer.submit("summary", summary)
+        return self.generation
+
+    def durability(self):
+        """Write-behind state, see WriteBehind.state()."""
+        return self.writer.state()
+
+    # ---------- Other writers ----------
+
+    def poll(self, blocking=True):
+        """
+        Publish games / summaries other processes saved; returns the
+        generation. With blocking=False this is skipped while the store is
+        busy (e.g. compacting).
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return self.generation
+        try:
+            self._poll_locked()
+            return self.generation
+        finally:
+            self._lock.release()
+
+    def _poll_locked(self):
+        events, snapshot = poll()
+        if not events and snapshot is None:
+            return
+
+        new = [(e["type"], e["data"]) for e in events]
+        if snapshot is not None:
+            # another process compacted: its writes may only be in the
+            # snapshot now, and it holds ours too, so merge by id
+            table, summaries = snapshot
+            game_ids = set(self._games.numpy_column("game_id").tolist())
+            missing = [
+                i for i, gid in enumerate(table.numpy_column("game_id").tolist())
+                if gid not in game_ids
+            ]
+            new = (
+                [("game", table.game(i)) for i in missing]
+                + [("summary", s) for s in summaries]
+                + new
+            )
+        else:
+            game_ids = None
+
+        for kind, data in new:
+            if kind == "game":
+                if game_ids is not None:
+                    if data["game_id"] in game_ids:
+                        continue
+                    game_ids.add(data["game_id"])
+                self._append_game_locked(data)
+                self._max_game_id = max(self._max_game_id, data.get("game_id", 0))
+            elif kind == "summary":
+                if data.get("summary_id") in self.summary_index.by_id:
+                    continue
+                self._summaries.append(data)
+                self.summary_index.sync(self._summaries)
+        self.generation += 1
+
+    # ---------- Writer thread ----------
+
+    def _write_events(self, events):
+        """
+        Journal a batch in order: one append (and fsync) per run of games.
+        Each append's events are removed from `events` once durable, so a
+        retry after a failure does not journal them twice.
+        """
+        while events:
+            kind = events[0][0]
+            if kind == "game":
+                run = sum(1 for _ in itertools.takewhile(lambda e: e[0] == kind, events))
+                append_games([data for _, data in events[:run]])
+            else:
+                run = 1
+                append_summary(events[0][1])
+            del events[:run]
+
+    def _compact(self):
+        """
+        Fold the journal into a snapshot when it is due.
+
+        Only runs when nothing is queued (so every game held here is in the
+        journal) and no save holds the lock (so the writer never waits on
+        the UI thread); otherwise it is retried after the next write. The
+        lock is only held to take the views: they are immutable prefixes, so
+        saves go on while the snapshot is written, and anything saved
+        meanwhile is journaled after it by this (the writer) thread. The
+        save is a compare-and-swap on the data version: if another process
+        wrote in between, it is skipped and retried once those writes are in.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self.writer.pending:
+                return
+            self._poll_locked()
+            games = self._games.view()
+            summaries = SeasonView(self._summaries, len(self._summaries))
+            version = data_version()
+        finally:
+            self._lock.release()
+
+        try:
+            with self._compacting:
+                maybe_compact(games, summaries, expected_version=version)
+        except StaleDataError:
+            pass
+
+
+@st.cache_resource
+def get_shared_season():
+    """The process-wide season store (created once, on first use)."""
+    return SharedSeason()
+
+
+def refresh_session_views():
+    """Point this session at the latest shared views if the data changed."""
+    season = get_shared_season()
+    # games / summaries saved by other processes since the last rerun
+    season.poll(blocking=False)
+    if st.session_state.get("data_generation") != season.generation:
+        st.session_state.games = season.games_view()
+        st.session_state.summaries = season.summaries_view()
+        st.session_state.data_generation = season.generation
+    st.session_state.next_game_id = season.next_game_id
+    return season
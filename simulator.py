@@ -0,0 +1,313 @@
+# simulator.py
+#
+# Monte Carlo championship odds: sample the rest of the season, re-score it
+# with the real rules (incl. consistency streaks) and count final ranks.
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from consistency import (
+    BACK_TO_BACK_TOP2_POINTS,
+    THREE_STRAIGHT_TOP2_POINTS,
+    NO_FOURTH_POINTS,
+    NO_FOURTH_BLOCK,
+)
+from scoring import SEASON_GAMES
+from season_engine import load_season_arrays, compute_season_breakdown
+
+DEFAULT_SAMPLES = 1_000_000
+DEFAULT_BATCH_SIZE = 25_000
+DEFAULT_TIME_BUDGET = 1.0  # seconds
+
+# Synthetic games used for placements never seen in the history yet
+FALLBACK_GAMES = 500
+
+_pool = None
+_pool_workers = None
+
+
+def build_outcome_model(games_sorted, players):
+    """
+    Per-placement pools of (bonus_stars, coins) from the history, plus how often
+    a game has a most-items / most-spaces winner. Sampling draws from these.
+    """
+    season = load_season_arrays(games_sorted, players)
+    placement = season["placement"].ravel()
+    stars = season["bonus_stars"].ravel()
+    coins = season["coins"].ravel()
+    n_games = len(games_sorted)
+
+    fallback = None
+    pools = {}
+    for k in range(1, len(players) + 1):
+        mask = placement == k
+        if not mask.any():
+            if fallback is None:
+                from synthetic import generate_season
+
+                fallback = load_season_arrays(
+                    generate_season(FALLBACK_GAMES, players, seed=0), players
+                )
+            mask_fb = fallback["placement"] == k
+            pools[k] = (fallback["bonus_stars"][mask_fb], fallback["coins"][mask_fb])
+        else:
+            pools[k] = (stars[mask], coins[mask])
+
+    if n_games:
+        items_rate = float(season["most_items_used"].any(axis=1).mean())
+        spaces_rate = float(season["most_spaces_travelled"].any(axis=1).mean())
+    else:
+        from synthetic import SINGLE_WINNER_CHANCE
+
+        items_rate = spaces_rate = SINGLE_WINNER_CHANCE
+
+    return {
+        "pools": pools,
+        "items_rate": items_rate,
+        "spaces_rate": spaces_rate,
+    }
+
+
+def current_state(standings):
+    """Totals + per-player consistency state from a StandingsAggregator."""
+    players = standings.players
+    states = np.array([standings.consistency.state(p) for p in players], dtype=np.int64)
+    return {
+        "totals": np.array([standings.final_totals[p] for p in players], dtype=np.int64),
+        "top2_streak": states[:, 0],
+        "block_games": states[:, 1],
+        "block_fourths": states[:, 2],
+    }
+
+
+def sample_outcomes(model, n_players, remaining, n_samples, rng):
+    """
+    Sample n_samples completions of the season.
+    Returns season-style arrays shaped (samples, remaining, players).
+    """
+    shape = (n_samples, remaining, n_players)
+
+    # Placements: a uniformly random permutation of 1..P per game
+    perms = np.array(list(itertools.permutations(range(1, n_players + 1))), dtype=np.int64)
+    placement = perms[rng.integers(0, len(perms), shape[:2])]
+
+    # Stars / coins drawn from the pool for the sampled placement (padded
+    # pools, so one gather serves every placement at once)
+    pools = model["pools"]
+    pool_len = np.array([len(pools[k][0]) for k in sorted(pools)], dtype=np.int64)
+    pool_stars = np.zeros((len(pools), pool_len.max()), dtype=np.int64)
+    pool_coins = np.zeros_like(pool_stars)
+    for i, k in enumerate(sorted(pools)):
+        pool_stars[i, : pool_len[i]] = pools[k][0]
+        pool_coins[i, : pool_len[i]] = pools[k][1]
+
+    row = placement - 1
+    idx = (rng.random(shape) * pool_len[row]).astype(np.int64)
+    bonus_stars = pool_stars[row, idx]
+    coins = pool_coins[row, idx]
+
+    # Single-winner flags: at most one winner per game
+    who = np.arange(n_players)
+    items_winner = np.where(
+        rng.random(shape[:2]) < model["items_rate"], rng.integers(0, n_players, shape[:2]), -1
+    )
+    spaces_winner = np.where(
+        rng.random(shape[:2]) < model["spaces_rate"], rng.integers(0, n_players, shape[:2]), -1
+    )
+
+    return {
+        "placement": placement,
+        "bonus_stars": bonus_stars,
+        "coins": coins,
+        "most_items_used": items_winner[..., None] == who,
+        "most_spaces_travelled": spaces_winner[..., None] == who,
+    }
+
+
+def score_outcomes(outcomes, state):
+    """Final season totals (samples, players) for sampled outcomes, incl. consistency."""
+    placement = outcomes["placement"]
+    n_samples, remaining, n_players = placement.shape
+
+    flat = (n_samples * remaining, n_players)
+    breakdown = compute_season_breakdown(
+        {name: values.reshape(flat) for name, values in outcomes.items()}
+    )
+    totals = state["totals"] + breakdown["base_total"].reshape(placement.shape).sum(axis=1)
+
+    # Consistency bonuses, streamed game by game from the current state
+    streak = np.tile(state["top2_streak"], (n_samples, 1))
+    block_games = np.tile(state["block_games"], (n_samples, 1))
+    block_fourths = np.tile(state["block_fourths"], (n_samples, 1))
+    for r in range(remaining):
+        pl = placement[:, r, :]
+        streak = np.where(pl <= 2, streak + 1, 0)
+        totals += BACK_TO_BACK_TOP2_POINTS * (streak >= 2)
+        totals += THREE_STRAIGHT_TOP2_POINTS * (streak >= 3)
+
+        block_games += 1
+        block_fourths += pl == 4
+        block_end = block_games == NO_FOURTH_BLOCK
+        totals += NO_FOURTH_POINTS * (block_end & (block_fourths == 0))
+        block_games[block_end] = 0
+        block_fourths[block_end] = 0
+
+    return totals
+
+
+def simulate_batch(model, state, remaining, n_samples, seed):
+    """
+    Sample and score n_samples completions of the season; returns rank counts,
+    an int array (players, players): counts[i, r] = times player i finished rank r+1.
+    """
+    rng = np.random.default_rng(seed)
+    n_players = len(state["totals"])
+
+    outcomes = sample_outcomes(model, n_players, remaining, n_samples, rng)
+    totals = score_outcomes(outcomes, state)
+
+    # Standard competition ranking (1,2,2,4), like assign_ranks
+    ranks = (totals[:, None, :] > totals[:, :, None]).sum(axis=2)
+    cells = np.arange(n_players) * n_players + ranks
+    return np.bincount(cells.ravel(), minlength=n_players * n_players).reshape(
+        n_players, n_players
+    )
+
+
+def default_workers():
+    """Worker processes to use: one per core, or 0 (in-process) on a single core."""
+    workers = os.cpu_count() or 1
+    return 0 if workers == 1 else workers
+
+
+def _started():
+    """No-op task: done once a worker is up (and has imported this module)."""
+    return os.getpid()
+
+
+def start_pool(workers=None):
+    """
+    A process pool whose workers start right away, in the background.
+    Spawned workers take a while to import NumPy; a long-lived pool started
+    before the first simulation keeps that out of its time budget.
+    Returns None when simulations run in-process (workers=0).
+    """
+    workers = default_workers() if workers is None else workers
+    if workers == 0:
+        return None
+    # spawn: safe to start from a multi-threaded server process
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    for _ in range(workers):
+        pool.submit(_started)
+    return pool
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool = start_pool(workers)
+        _pool_workers = workers
+    return _pool
+
+
+def simulate_championship(standings, games_sorted=None, n_samples=DEFAULT_SAMPLES,
+                          season_games=SEASON_GAMES, seed=None,
+                          time_budget=DEFAULT_TIME_BUDGET,
+                          batch_size=DEFAULT_BATCH_SIZE, workers=None, pool=None):
+    """
+    Probability of each player finishing at each rank after the season.
+
+    standings: StandingsAggregator with the games played so far.
+    Stops at n_samples or when time_budget (seconds) runs out, whichever is
+    first (at least one batch always runs). workers=0 runs in-process.
+    pool: a long-lived pool from start_pool() (default: one kept by this
+    module, started on first use).
+
+    Returns:
+      {
+        "remaining_games": int,
+        "samples": int,
+        "elapsed": float,
+        "rank_probabilities": {player: [P(rank 1), ..., P(rank P)]},
+      }
+    """
+    start = time.perf_counter()
+    players = standings.players
+    n_players = len(players)
+    remaining = max(season_games - standings.n_games, 0)
+    state = current_state(standings)
+
+    if remaining == 0:
+        # Season over: the current ranks are final
+        probs = {p: [0.0] * n_players for p in players}
+        for p in players:
+            probs[p][standings.ranks[p] - 1] = 1.0
+        return {
+            "remaining_games": 0,
+            "samples": 0,
+            "elapsed": time.perf_counter() - start,
+            "rank_probabilities": probs,
+        }
+
+    model = build_outcome_model(
+        games_sorted if games_sorted is not None else standings.games_sorted, players
+    )
+    n_batches = max(1, -(-n_samples // batch_size))
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [batch_size] * (n_batches - 1) + [n_samples - batch_size * (n_batches - 1)]
+
+    counts = np.zeros((n_players, n_players), dtype=np.int64)
+    done = 0
+
+    def out_of_time():
+        return done > 0 and time.perf_counter() - start >= time_budget
+
+    if workers is None:
+        # a pool only pays off with more than one core
+        workers = default_workers()
+
+    if workers == 0:
+        for size, batch_seed in zip(sizes, seeds):
+            if out_of_time():
+                break
+            counts += simulate_batch(model, state, remaining, size, batch_seed)
+            done += size
+    else:
+        pool = pool or _get_pool(workers)
+        pending = {}
+        next_batch = 0
+        while next_batch < n_batches or pending:
+            # keep every worker busy while there is time left
+            while next_batch < n_batches and len(pending) < 2 * workers and not out_of_time():
+                future = pool.submit(
+                    simulate_batch, model, state, remaining, sizes[next_batch], seeds[next_batch]
+                )
+                pending[future] = sizes[next_batch]
+                next_batch += 1
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                counts += future.result()
+                done += pending.pop(future)
+            if out_of_time():
+                for future in pending:
+                    future.cancel()
+                break
+
+    total = counts.sum(axis=1, keepdims=True)
+    probs = counts / np.maximum(total, 1)
+    return {
+        "remaining_games": remaining,
+        "samples": done,
+        "elapsed": time.perf_counter() - start,
+        "rank_probabilities": {p: probs[i].tolist() for i, p in enumerate(players)},
+    }
@@ -0,0 +1,447 @@
+# sqlite_storage.py
+import json
+import sqlite3
+
+DB_FILE = "marioparty.db"
+
+# Result fields that get their own column; anything else round-trips via `extra`
+RESULT_FIELDS = [
+    "placement",
+    "bonus_stars",
+    "coins",
+    "most_items_used",
+    "most_spaces_travelled",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id INTEGER PRIMARY KEY,
+    extra   TEXT NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    game_id               INTEGER NOT NULL REFERENCES games(game_id),
+    player                TEXT    NOT NULL,
+    placement             INTEGER NOT NULL,
+    bonus_stars           INTEGER NOT NULL DEFAULT 0,
+    coins                 INTEGER NOT NULL DEFAULT 0,
+    most_items_used       INTEGER NOT NULL DEFAULT 0,
+    most_spaces_travelled INTEGER NOT NULL DEFAULT 0,
+    points                INTEGER,
+    extra                 TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (game_id, player)
+);
+
+CREATE INDEX IF NOT EXISTS idx_results_game_id ON results (game_id);
+CREATE INDEX IF NOT EXISTS idx_results_player ON results (player, game_id);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    summary_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label      TEXT NOT NULL,
+    data       TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_summaries_label ON summaries (label);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+-- One row per write, in commit order, so each process can pick up what the
+-- others saved (changes_since). kind: "game" / "summary" (ref = game_id /
+-- summaries.summary_id) or "reset" (save_data replaced everything).
+CREATE TABLE IF NOT EXISTS changes (
+    seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+    writer TEXT    NOT NULL,
+    kind   TEXT    NOT NULL,
+    ref    INTEGER
+);
+"""
+
+
+def connect(path=None):
+    """Open the database in WAL mode and make sure the schema exists."""
+    conn = sqlite3.connect(path or DB_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---------- Row <-> dict conversion (storage boundary) ----------
+
+def _game_rows(game):
+    gid = int(game["game_id"])
+    game_extra = {
+        k: v for k, v in game.items() if k not in ("game_id", "results", "points")
+    }
+    points = game.get("points", {})
+
+    result_rows = []
+    for player, r in game["results"].items():
+        result_extra = {k: v for k, v in r.items() if k not in RESULT_FIELDS}
+        result_rows.append(
+            (
+                gid,
+                player,
+                int(r["placement"]),
+                int(r.get("bonus_stars", 0)),
+                int(r.get("coins", 0)),
+                int(bool(r.get("most_items_used", False))),
+                int(bool(r.get("most_spaces_travelled", False))),
+                points.get(player),
+                json.dumps(result_extra),
+            )
+        )
+    return (gid, json.dumps(game_extra)), result_rows
+
+
+def _insert_games(conn, games, writer=""):
+    game_rows = []
+    result_rows = []
+    for g in games:
+        game_row, rows = _game_rows(g)
+        game_rows.append(game_row)
+        result_rows.extend(rows)
+
+    conn.executemany("INSERT INTO games (game_id, extra) VALUES (?, ?)", game_rows)
+    conn.executemany(
+        "INSERT INTO results (game_id, player, placement, bonus_stars, coins,"
+        " most_items_used, most_spaces_travelled, points, extra)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        result_rows,
+    )
+    conn.executemany(
+        "INSERT INTO changes (writer, kind, ref) VALUES (?, 'game', ?)",
+        [(writer, gid) for gid, _ in game_rows],
+    )
+
+
+def _insert_summaries(conn, summaries, writer=""):
+    for s in summaries:
+        cursor = conn.execute(
+            "INSERT INTO summaries (label, data) VALUES (?, ?)",
+            (s.get("label", ""), json.dumps(s)),
+        )
+        conn.execute(
+            "INSERT INTO changes (writer, kind, ref) VALUES (?, 'summary', ?)",
+            (writer, cursor.lastrowid),
+        )
+
+
+def _load_games(conn, game_ids=None):
+    """Games as dicts, by game_id: every game, or only those in game_ids."""
+    where, params = "", []
+    if game_ids is not None:
+        if not game_ids:
+            return {}
+        # a range rather than IN (...): no limit on bound parameters, and
+        # new games are the newest ids anyway
+        where = " WHERE game_id BETWEEN ? AND ?"
+        params = [min(game_ids), max(game_ids)]
+
+    games = {}
+    for gid, extra in conn.execute(
+        f"SELECT game_id, extra FROM games{where} ORDER BY game_id", params
+    ):
+        game = {"game_id": gid, "results": {}}
+        game.update(json.loads(extra))
+        games[gid] = game
+
+    rows = conn.execute(
+        "SELECT game_id, player, placement, bonus_stars, coins,"
+        " most_items_used, most_spaces_travelled, points, extra"
+        f" FROM results{where} ORDER BY game_id",
+        params,
+    )
+    for gid, player, pl, stars, coins, items, spaces, pts, extra in rows:
+        game = games[gid]
+        r = {
+            "placement": pl,
+            "bonus_stars": stars,
+            "coins": coins,
+            "most_items_used": bool(items),
+            "most_spaces_travelled": bool(spaces),
+        }
+        r.update(json.loads(extra))
+        game["results"][player] = r
+        if pts is not None:
+            game.setdefault("points", {})[player] = pts
+    if game_ids is not None:
+        wanted = set(game_ids)
+        games = {gid: game for gid, game in games.items() if gid in wanted}
+    return games
+
+
+# ---------- Same interface as storage.py ----------
+
+def _latest_seq(conn):
+    (seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()
+    return seq
+
+
+def load_data(path=None):
+    """
+    Load games + summaries from the database.
+    Returns: (games, summaries)
+    """
+    games, summaries, _ = load_data_at(path)
+    return games, summaries
+
+
+def load_data_at(path=None):
+    """
+    load_data() plus the changes seq it is current to, read in one transaction.
+    Returns: (games, summaries, seq)
+    """
+    conn = connect(path)
+    try:
+        conn.execute("BEGIN")
+        seq = _latest_seq(conn)
+        games = _load_games(conn)
+        summaries = [
+            json.loads(data)
+            for (data,) in conn.execute("SELECT data FROM summaries ORDER BY summary_id")
+        ]
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    return list(games.values()), summaries, seq
+
+
+def changes_since(seq, writer, path=None):
+    """
+    What other writers saved after changes seq `seq`, read in one transaction.
+
+    Returns: (events, snapshot, latest_seq) with events in storage.poll()
+    form ({"seq", "type", "writer", "data"}) and snapshot None, or
+    (games, summaries) with everything when another writer called
+    save_data() since: the caller merges that by game_id / summary_id.
+    """
+    conn = connect(path)
+    try:
+        conn.execute("BEGIN")
+        rows = conn.execute(
+            "SELECT seq, writer, kind, ref FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        latest = rows[-1][0] if rows else seq
+        foreign = [row for row in rows if row[1] != writer]
+
+        snapshot = None
+        events = []
+        if any(kind == "reset" for _, _, kind, _ in foreign):
+            games = _load_games(conn)
+            summaries = [
+                json.loads(data)
+                for (data,) in conn.execute("SELECT data FROM summaries ORDER BY summary_id")
+            ]
+            snapshot = (list(games.values()), summaries)
+        elif foreign:
+            games = _load_games(conn, [ref for _, _, kind, ref in foreign if kind == "game"])
+            summary_ids = [ref for _, _, kind, ref in foreign if kind == "summary"]
+            summaries = {}
+            if summary_ids:
+                summaries = dict(conn.execute(
+                    "SELECT summary_id, data FROM summaries WHERE summary_id BETWEEN ? AND ?",
+                    (min(summary_ids), max(summary_ids)),
+                ))
+            for row_seq, row_writer, kind, ref in foreign:
+                if kind == "game" and ref in games:
+                    data = games[ref]
+                elif kind == "summary" and ref in summaries:
+                    data = json.loads(summaries[ref])
+                else:
+                    # deleted by a later reset
+                    continue
+                events.append({"seq": row_seq, "type": kind, "writer": row_writer, "data": data})
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return events, snapshot, latest
+
+
+def save_data(games, summaries, path=None, writer=""):
+    """Replace the whole database contents in one transaction."""
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM games")
+            conn.execute("DELETE FROM summaries")
+            # changes before the reset only name rows that are gone now
+            conn.execute("DELETE FROM changes")
+            _insert_games(conn, games, writer)
+            _insert_summaries(conn, summaries, writer)
+            conn.execute("INSERT INTO changes (writer, kind) VALUES (?, 'reset')", (writer,))
+    finally:
+        conn.close()
+
+
+def append_game(game, path=None, writer=""):
+    """Insert one game and its results in one transaction."""
+    append_games([game], path, writer)
+
+
+def append_games(games, path=None, writer=""):
+    """Insert a batch of games in one transaction."""
+    conn = connect(path)
+    try:
+        with conn:
+            _insert_games(conn, games, writer)
+    finally:
+        conn.close()
+
+
+def append_summary(summary, path=None, writer=""):
+    conn = connect(path)
+    try:
+        with conn:
+            _insert_summaries(conn, [summary], writer)
+    finally:
+        conn.close()
+
+
+def allocate_ids(kind, n=1, floor=0, path=None):
+    """Reserve n consecutive ids of kind "game_id" / "summary_id"; returns the first."""
+    conn = connect(path)
+    try:
+        with conn:
+            # the UPDATE takes the write lock, so concurrent callers serialize here
+            conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)", (kind,))
+            conn.execute(
+                "UPDATE counters SET value = max(value, ?) + ? WHERE name = ?",
+                (floor, n, kind),
+            )
+            (last,) = conn.execute(
+                "SELECT value FROM counters WHERE name = ?", (kind,)
+            ).fetchone()
+    finally:
+        conn.close()
+    return last - n + 1
+
+
+# ---------- Aggregates pushed down into SQL ----------
+
+def player_aggregates(players, path=None):
+    """
+    Wins, podiums and per-rule point sums per player, computed in SQL.
+
+    Uses the same rules as compute_game_points_breakdown: every value comes
+    from scoring.RULESETS, by each game's "ruleset" tag (untagged games score
+    under DEFAULT_RULESET; an unknown tag raises ValueError, as in
+    scoring.get_ruleset); most/least coins are window aggregates over each
+    game's players.
+
+    Returns:
+      aggregates[player] = {
+          "games": int, "wins": int, "podiums": int,
+          "placement_pts": int, ..., "spaces_pts": int, "base_total": int,
+      }
+    """
+    from scoring import RULESETS, DEFAULT_RULESET, get_ruleset
+
+    def by_ruleset(expr):
+        """SQL for expr(rules), picked by each row's ruleset tag."""
+        cases = " ".join(
+            "WHEN '{}' THEN {}".format(ruleset_id.replace("'", "''"), expr(rules))
+            for ruleset_id, rules in RULESETS.items()
+            if ruleset_id != DEFAULT_RULESET
+        )
+        default = expr(RULESETS[DEFAULT_RULESET])
+        return f"CASE ruleset {cases} ELSE {default} END" if cases else default
+
+    def placement_pts(rules):
+        whens = " ".join(
+            f"WHEN {int(pl)} THEN {int(pts)}" for pl, pts in rules["placement_points"].items()
+        )
+        return f"CASE placement {whens} ELSE 0 END"
+
+    marks = ", ".join("?" for _ in players)
+
+    sql = f"""
+        WITH r AS (
+            SELECT player, placement, bonus_stars, coins,
+                   most_items_used, most_spaces_travelled,
+                   COALESCE(json_extract(games.extra, '$.ruleset'), '') AS ruleset,
+                   MAX(coins) OVER (PARTITION BY game_id) AS max_coins,
+                   MIN(coins) OVER (PARTITION BY game_id) AS min_coins
+            FROM results JOIN games USING (game_id)
+            WHERE player IN ({marks})
+        )
+        SELECT player,
+               COUNT(*),
+               SUM(placement = 1),
+               SUM(placement BETWEEN 1 AND 3),
+               SUM({by_ruleset(placement_pts)}),
+               SUM({by_ruleset(lambda r: f"bonus_stars * {int(r['bonus_star_points'])}")}),
+               SUM({by_ruleset(lambda r: (
+                   f"MIN(coins / {int(r['coin_threshold'])}, {int(r['coin_threshold_max'])})"
+                   f" * {int(r['coin_threshold_points'])}"
+               ))}),
+               SUM(CASE WHEN coins = max_coins AND max_coins > 0
+                   THEN {by_ruleset(lambda r: int(r['coin_most_points']))} ELSE 0 END),
+               SUM(CASE WHEN coins = min_coins
+                   THEN {by_ruleset(lambda r: int(r['coin_least_points']))} ELSE 0 END),
+               SUM(most_items_used * {by_ruleset(lambda r: int(r['items_points']))}),
+               SUM(most_spaces_travelled * {by_ruleset(lambda r: int(r['spaces_points']))})
+        FROM r
+        GROUP BY player
+    """
+
+    columns = [
+        "games",
+        "wins",
+        "podiums",
+        "placement_pts",
+        "bonus_star_pts",
+        "coin_threshold_pts",
+        "coin_most_pts",
+        "coin_least_pts",
+        "items_pts",
+        "spaces_pts",
+    ]
+    aggregates = {p: {col: 0 for col in columns} for p in players}
+
+    conn = connect(path)
+    try:
+        tags = conn.execute(
+            "SELECT DISTINCT json_extract(extra, '$.ruleset') FROM games"
+        ).fetchall()
+        for (tag,) in tags:
+            if tag is not None:
+                get_ruleset(tag)
+        for row in conn.execute(sql, list(players)):
+            aggregates[row[0]] = dict(zip(columns, (int(v or 0) for v in row[1:])))
+    finally:
+        conn.close()
+
+    for agg in aggregates.values():
+        agg["base_total"] = sum(agg[col] for col in columns[3:])
+    return aggregates
+
+
+def placement_timeline(players, path=None):
+    """Yield (game_id, player, placement) in season order, for consistency bonuses."""
+    marks = ", ".join("?" for _ in players)
+    conn = connect(path)
+    try:
+        yield from conn.execute(
+            f"SELECT game_id, player, placement FROM results"
+            f" WHERE player IN ({marks}) ORDER BY game_id",
+            list(players),
+        )
+    finally:
+        conn.close()
+
+
+def consistency_totals(players, path=None):
+    """Consistency bonus totals per player, streamed from the placement column only."""
+    from consistency import ConsistencyTracker
+
+    tracker = ConsistencyTracker(players)
+    totals = {p: 0 for p in players}
+    for _, player, placement in placement_timeline(players, path):
+        totals[player] += tracker.push_placement(player, int(placement))
+    return totals
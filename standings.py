@@ -0,0 +1,436 @@
+# standings.py
+import bisect
+from array import array
+
+import perf
+from consistency import ConsistencyTracker, NO_FOURTH_BLOCK
+from scoring import RULE_COLUMNS, compute_game_points_breakdown, assign_ranks
+
+# Per-game breakdown columns kept by the aggregator (one entry per game per
+# player, game-major), with their array typecodes. "player" holds the index
+# into StandingsAggregator.players.
+BREAKDOWN_COLUMNS = (
+    ["game_id", "player", "placement"] + RULE_COLUMNS + ["base_total", "consistency"]
+)
+COLUMN_TYPECODES = dict({col: "i" for col in BREAKDOWN_COLUMNS}, player="b", placement="b")
+
+# Breakdown sort keys: any breakdown column, or "total" (base + consistency)
+BREAKDOWN_SORT_KEYS = BREAKDOWN_COLUMNS + ["total"]
+
+# sync() rebuilds instead of appending once this many games are new (the
+# vectorized pass beats folding games in one at a time)
+REBUILD_THRESHOLD = 1000
+
+# Running sums kept per player after every game (point-in-time standings)
+PREFIX_COLUMNS = ["base_total", "consistency", "wins", "podiums"]
+
+
+def _column(typecode, values):
+    """A typed array holding a NumPy array's values (rebuild path only)."""
+    import numpy as np
+
+    from game_table import NUMPY_DTYPES
+
+    column = array(typecode)
+    column.frombytes(np.ascontiguousarray(values, dtype=NUMPY_DTYPES[typecode]).tobytes())
+    return column
+
+
+def standings_rows(snapshot, players):
+    """Standings table rows from a standings_at() snapshot."""
+    return [
+        {
+            "Rank": snapshot["ranks"][p],
+            "Player": p,
+            "Wins": snapshot["wins"][p],
+            "Podiums": snapshot["podiums"][p],
+            "Base Points": snapshot["base_totals"][p],
+            "Consistency Bonus": snapshot["consistency_totals"][p],
+            "Total Points": snapshot["final_totals"][p],
+        }
+        for p in players
+    ]
+
+
+class StandingsAggregator:
+    """
+    Running season standings, updated in O(players) when a game is appended.
+
+    Holds:
+      base_totals[player] -> int
+      wins[player], podiums[player] -> int
+      rule_totals[player][rule] -> int  (running sum per rule column)
+      consistency -> ConsistencyTracker (streaming per-player streak state)
+      consistency_totals[player] -> int
+      final_totals[player], ranks[player] -> int
+      columns[name] -> array  (per-game breakdown, one entry per game per player,
+                               row g * P + j for game g and players[j])
+      prefix[name] -> array  (running sums for PREFIX_COLUMNS after 0, 1, ..., n
+                              games, row k * P + j; standings_at(k) reads these)
+      rebuilds -> int  (bumped by every rebuild, for state kept alongside,
+                        e.g. ratings.RatingHistory)
+
+    Call sync(games) with the full games list (or a game_table view) on every
+    render: appended games are folded in incrementally, anything else (edits,
+    deletes, out-of-order game_ids) falls back to rebuild(games), and so do
+    the first sync and blocks of more than REBUILD_THRESHOLD new games.
+    """
+
+    def __init__(self, players):
+        self.players = list(players)
+        self.rebuilds = 0
+        self.reset()
+
+    def reset(self):
+        players = self.players
+        self.games_sorted = []
+        self.base_totals = {p: 0 for p in players}
+        self.wins = {p: 0 for p in players}
+        self.podiums = {p: 0 for p in players}
+        self.rule_totals = {p: {col: 0 for col in RULE_COLUMNS} for p in players}
+        self.consistency = ConsistencyTracker(players)
+        self.consistency_totals = {p: 0 for p in players}
+        self.final_totals = {p: 0 for p in players}
+        self.ranks = assign_ranks(self.final_totals)
+        self.columns = {col: array(COLUMN_TYPECODES[col]) for col in BREAKDOWN_COLUMNS}
+        self.prefix = {name: array("q", [0] * len(players)) for name in PREFIX_COLUMNS}
+        self._last_seen = None
+        self._dirty = False
+        self._sorted_rows = None
+
+    def invalidate(self):
+        """Force a rebuild on the next sync (use after editing a game in place)."""
+        self._dirty = True
+
+    @property
+    def n_games(self):
+        return len(self.games_sorted)
+
+    @property
+    def game_ids(self):
+        """game_id of every game, in season order."""
+        return self.columns["game_id"][:: len(self.players)].tolist()
+
+    # ---------- Full recompute ----------
+
+    def rebuild(self, games):
+        """Recompute everything from scratch in one vectorized pass."""
+        # NumPy only loads for the vectorized path; appends stay pure Python
+        import numpy as np
+
+        from season_engine import (
+            load_season_arrays,
+            compute_season_breakdown,
+            compute_season_consistency,
+        )
+
+        self.reset()
+        self.rebuilds += 1
+        players = self.players
+        n_players = len(players)
+
+        if getattr(games, "is_sorted", False):
+            # game_table view already in season order: read its columns directly
+            games_sorted = games
+        elif hasattr(games, "in_season_order"):
+            # game_table view out of order: read the columns through an argsort
+            games_sorted = games.in_season_order()
+        else:
+            games_sorted = sorted(games, key=lambda g: g.get("game_id", 0))
+        n_games = len(games_sorted)
+
+        with perf.stage("breakdown"):
+            season = load_season_arrays(games_sorted, players)
+            breakdown = compute_season_breakdown(season)
+            placement = season["placement"]
+
+            for j, p in enumerate(players):
+                self.base_totals[p] = int(breakdown["base_total"][:, j].sum())
+                self.wins[p] = int((placement[:, j] == 1).sum())
+                self.podiums[p] = int(((placement[:, j] >= 1) & (placement[:, j] <= 3)).sum())
+                for col in RULE_COLUMNS:
+                    self.rule_totals[p][col] = int(breakdown[col][:, j].sum())
+
+            running = {
+                "base_total": breakdown["base_total"],
+                "wins": placement == 1,
+                "podiums": (placement >= 1) & (placement <= 3),
+            }
+            for name, values in running.items():
+                sums = np.zeros((n_games + 1, n_players), dtype=np.int64)
+                np.cumsum(values, axis=0, out=sums[1:])
+                self.prefix[name] = _column("q", sums)
+
+            self.columns["game_id"] = _column("i", np.repeat(season["game_id"], n_players))
+            self.columns["player"] = _column("b", np.tile(np.arange(n_players), n_games))
+            self.columns["placement"] = _column("b", placement)
+            for col in RULE_COLUMNS + ["base_total"]:
+                self.columns[col] = _column("i", breakdown[col])
+
+        with perf.stage("consistency"):
+            bonus = compute_season_consistency(placement)
+            self.columns["consistency"] = _column("i", bonus)
+            sums = np.zeros((n_games + 1, n_players), dtype=np.int64)
+            np.cumsum(bonus, axis=0, out=sums[1:])
+            self.prefix["consistency"] = _column("q", sums)
+
+            # Leave the streaming tracker where the season ends, for appends
+            in_block = n_games % NO_FOURTH_BLOCK
+            top2 = placement <= 2
+            for j, p in enumerate(players):
+                self.consistency_totals[p] = int(sums[-1, j])
+                breaks = np.flatnonzero(~top2[:, j])
+                last_break = breaks[-1] if len(breaks) else -1
+                self.consistency.top2_streak[p] = int(n_games - 1 - last_break)
+                self.consistency.block_games[p] = in_block
+                self.consistency.block_fourths[p] = int(
+                    (placement[n_games - in_block:, j] == 4).sum()
+                )
+        perf.count("games_processed", n_games)
+
+        self.games_sorted = games_sorted
+        self._last_seen = games[-1] if isinstance(games_sorted, list) and games else None
+        self._refresh_ranks()
+
+    # ---------- Incremental path ----------
+
+    def append(self, game):
+        """Fold one new game (with the highest game_id so far) into the totals."""
+        if not isinstance(self.games_sorted, list):
+            self.games_sorted = list(self.games_sorted)
+        self.games_sorted.append(game)
+        self._last_seen = game
+        self._apply_breakdown(game)
+        self._apply_consistency(game)
+        self._refresh_ranks()
+
+    def _apply_breakdown(self, game):
+        results = game["results"]
+        breakdown = compute_game_points_breakdown(game, self.players)
+        gid = game.get("game_id", 0)
+        columns = self.columns
+        prefix = self.prefix
+
+        for j, p in enumerate(self.players):
+            pl = int(results[p]["placement"])
+            br = breakdown[p]
+
+            self.base_totals[p] += br["base_total"]
+            if pl == 1:
+                self.wins[p] += 1
+            if pl in (1, 2, 3):
+                self.podiums[p] += 1
+            for col in RULE_COLUMNS:
+                self.rule_totals[p][col] += br[col]
+
+            columns["game_id"].append(gid)
+            columns["player"].append(j)
+            columns["placement"].append(pl)
+            for col in RULE_COLUMNS + ["base_total"]:
+                columns[col].append(br[col])
+
+        for name, totals in (
+            ("base_total", self.base_totals),
+            ("wins", self.wins),
+            ("podiums", self.podiums),
+        ):
+            prefix[name].extend(totals[p] for p in self.players)
+
+    def _apply_consistency(self, game):
+        bonus = self.consistency.push(game)
+        for p in self.players:
+            b = bonus.get(p, 0)
+            self.consistency_totals[p] += b
+            self.columns["consistency"].append(b)
+        self.prefix["consistency"].extend(self.consistency_totals[p] for p in self.players)
+
+    def _refresh_ranks(self):
+        self.final_totals = {
+            p: self.base_totals[p] + self.consistency_totals.get(p, 0)
+            for p in self.players
+        }
+        self.ranks = assign_ranks(self.final_totals)
+
+    # ---------- Point-in-time queries ----------
+
+    def standings_at(self, k):
+        """
+        Standings after the first k games (season order), in O(players).
+
+        Returns:
+          {
+            "n_games": int,
+            "game_id": game_id of game k (None for k = 0),
+            "base_totals", "consistency_totals", "final_totals",
+            "wins", "podiums", "ranks": {player: int},
+          }
+        """
+        k = max(0, min(k, self.n_games))
+        n_players = len(self.players)
+        row = k * n_players
+        prefix = self.prefix
+        base = {p: prefix["base_total"][row + j] for j, p in enumerate(self.players)}
+        consistency = {p: prefix["consistency"][row + j] for j, p in enumerate(self.players)}
+        final = {p: base[p] + consistency[p] for p in self.players}
+        return {
+            "n_games": k,
+            "game_id": self.columns["game_id"][row - n_players] if k else None,
+            "base_totals": base,
+            "consistency_totals": consistency,
+            "final_totals": final,
+            "wins": {p: prefix["wins"][row + j] for j, p in enumerate(self.players)},
+            "podiums": {p: prefix["podiums"][row + j] for j, p in enumerate(self.players)},
+            "ranks": assign_ranks(final),
+        }
+
+    def running_totals(self, player):
+        """Total points (base + consistency) after each game, in season order."""
+        n_players = len(self.players)
+        j = self.players.index(player)
+        base = self.prefix["base_total"][n_players + j :: n_players]
+        consistency = self.prefix["consistency"][n_players + j :: n_players]
+        return [b + c for b, c in zip(base, consistency)]
+
+    def _extends(self, games):
+        """True if games starts with the n_games this aggregate has folded in."""
+        n = self.n_games
+        if len(games) < n:
+            return False
+        if n == 0:
+            return True
+        table = getattr(games, "table", None)
+        if table is not None:
+            # game tables are append-only: same table + longer view = appended
+            return table is getattr(self.games_sorted, "table", None)
+        return games[n - 1] is self._last_seen
+
+    def sync(self, games):
+        """
+        Bring the aggregate up to date with `games`.
+
+        Returns "unchanged", "appended" or "rebuilt".
+        """
+        n = self.n_games
+
+        in_place = not self._dirty and self._extends(games)
+        if in_place and len(games) == n:
+            return "unchanged"
+        if not n or len(games) - n > REBUILD_THRESHOLD:
+            # empty, or a large block (cold start, backfill): one vectorized pass
+            in_place = False
+
+        if in_place:
+            new_games = games[n:]
+            if not getattr(games, "is_sorted", False):
+                last_gid = self.games_sorted[-1].get("game_id", 0) if n else None
+                for g in new_games:
+                    gid = g.get("game_id", 0)
+                    if last_gid is not None and gid <= last_gid:
+                        in_place = False
+                        break
+                    last_gid = gid
+
+        if not in_place:
+            self.rebuild(games)
+            return "rebuilt"
+
+        with perf.stage("breakdown"):
+            for g in new_games:
+                self._apply_breakdown(g)
+        with perf.stage("consistency"):
+            for g in new_games:
+                self._apply_consistency(g)
+        perf.count("games_processed", len(new_games))
+
+        if hasattr(games, "table"):
+            self.games_sorted = self.games_sorted.extended(len(games))
+        else:
+            self.games_sorted.extend(new_games)
+            self._last_seen = games[-1]
+        self._refresh_ranks()
+        return "appended"
+
+    # ---------- Breakdown pages ----------
+
+    def _game_index(self, game_id, side):
+        """Position of game_id among the games (bisect, season order)."""
+        column = self.columns["game_id"]
+        n_players = len(self.players)
+        find = bisect.bisect_left if side == "left" else bisect.bisect_right
+        return find(range(self.n_games), game_id, key=lambda g: column[g * n_players])
+
+    def breakdown_page(self, players=None, game_ids=None, sort=None, descending=False,
+                       offset=0, limit=None):
+        """
+        One page of the per-game breakdown, filtered and sorted on the columns.
+
+        players:  names to include (default all)
+        game_ids: (first, last) game_id range, inclusive (None = open end)
+        sort:     a BREAKDOWN_SORT_KEYS name, or None for season order with
+                  players by name within a game; ties keep season order
+        offset, limit: rows to skip / return (limit None = all)
+
+        Only the page's rows are read out of the columns. Unsorted pages are
+        computed arithmetically; a sort orders the filtered rows once and
+        reuses that order for every page until the data changes.
+
+        Returns: (n_rows matching, {BREAKDOWN_SORT_KEYS name: list} for the page)
+        """
+        import numpy as np
+
+        n_players = len(self.players)
+        wanted = self.players if players is None else set(players)
+        selected = np.array(
+            sorted((j for j, p in enumerate(self.players) if p in wanted),
+                   key=lambda j: self.players[j]),
+            dtype=np.int64,
+        )
+        first, last = game_ids or (None, None)
+        start = 0 if first is None else self._game_index(first, "left")
+        stop = self.n_games if last is None else self._game_index(last, "right")
+        n_rows = max(stop - start, 0) * len(selected)
+
+        offset = min(max(offset, 0), n_rows)
+        end = n_rows if limit is None else min(offset + max(limit, 0), n_rows)
+        if sort is None:
+            idx = np.arange(offset, end)
+            rows = (start + idx // len(selected)) * n_players + selected[idx % len(selected)]
+        else:
+            rows = self._sorted_breakdown_rows(selected, start, stop, sort, descending)[offset:end]
+
+        columns = self.columns
+        page = {name: [columns[name][r] for r in rows.tolist()] for name in BREAKDOWN_COLUMNS}
+        page["total"] = [b + c for b, c in zip(page["base_total"], page["consistency"])]
+        return n_rows, page
+
+    def _sorted_breakdown_rows(self, selected, start, stop, sort, descending):
+        import numpy as np
+
+        from game_table import numpy_slice
+
+        key = (self.rebuilds, self.n_games, tuple(selected.tolist()), start, stop, sort, descending)
+        if self._sorted_rows is not None and self._sorted_rows[0] == key:
+            return self._sorted_rows[1]
+
+        n_players = len(self.players)
+        span = slice(start * n_players, stop * n_players)
+
+        def values(name):
+            block = numpy_slice(self.columns[name], span)
+            return block.reshape(-1, n_players)[:, selected].astype(np.int64).ravel()
+
+        with perf.stage("breakdown_sort"):
+            if sort == "total":
+                keys = values("base_total") + values("consistency")
+            elif sort == "player":
+                # by name, not by position in self.players
+                by_name = np.argsort(np.argsort(np.array(self.players, dtype=object)))
+                keys = by_name[values("player")]
+            else:
+                keys = values(sort)
+            # stable, so ties stay in season order (negating keeps that when descending)
+            order = np.argsort(-keys if descending else keys, kind="stable")
+            games = start + order // len(selected)
+            rows = games * n_players + selected[order % len(selected)]
+        self._sorted_rows = (key, rows)
+        return rows
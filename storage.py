@@ -1,38 +1,592 @@
 # storage.py
+#
+# Several processes (e.g. one Streamlit server per scorekeeper machine) may
+# share these files. Journal appends and snapshots happen under an advisory
+# file lock (LOCK_FILE), which also guards the data version (newest journal
+# seq, VERSION_FILE). Game / summary ids are handed out from ID_FILE under a
+# second lock, so allocating one never waits on another writer's fsync.
+# Each process tags its journal events with WRITER_ID and picks up everyone
+# else's with poll().
+import contextlib
 import json
 import os
+import threading
+import uuid
 
+import perf
+
+try:
+    import fcntl
+except ImportError:
+    # no flock (Windows): writers are only serialized within this process
+    fcntl = None
+
+# Snapshot of the whole season (rewritten only on compaction)
 DATA_FILE = "marioparty_data.json"
 
+# Append-only write-ahead journal of events since the last snapshot
+JOURNAL_FILE = "marioparty_journal.jsonl"
 
-def load_data():
+# Binary columnar mirror of the snapshot, memory-mapped on start (season_file.py)
+SEASON_FILE = "marioparty_season.bin"
+
+# Advisory lock files, held briefly across processes: LOCK_FILE by journal
+# appends and snapshots, ID_LOCK_FILE by id allocation
+LOCK_FILE = "marioparty.lock"
+ID_LOCK_FILE = "marioparty_ids.lock"
+
+# {"version": newest journal seq}
+VERSION_FILE = "marioparty_version.json"
+
+# {"game_id" / "summary_id": last id handed out}
+ID_FILE = "marioparty_ids.json"
+
+# Compact the journal into a new snapshot after this many events
+COMPACT_EVERY = 200
+
+# Games encoded per write while a snapshot is streamed out
+SNAPSHOT_CHUNK = 1000
+
+# "json" (snapshot + journal, below) or "sqlite" (sqlite_storage.py)
+STORAGE_BACKEND = os.environ.get("MARIOPARTY_STORAGE", "json")
+
+_lock = threading.Lock()
+_id_lock = threading.Lock()
+# Guards the read state below; never held across an fsync, so poll() does
+# not wait on writes
+_read_lock = threading.Lock()
+_last_seq = 0           # seq of the newest event written or replayed
+_journal_events = 0     # events in the journal not yet folded into a snapshot
+_journal_offset = 0     # journal bytes already read or written by this process
+_snapshot_sig = None    # file signature of DATA_FILE as last loaded / written
+_foreign = []           # other writers' events not yet handed out by poll()
+_snapshot_changed = False  # another writer compacted since the last poll()
+
+
+def _new_writer_id():
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+# Tags this process's journal events (regenerated in forked children)
+WRITER_ID = _new_writer_id()
+
+
+def _reset_writer_id():
+    global WRITER_ID
+    WRITER_ID = _new_writer_id()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_writer_id)
+
+
+class StaleDataError(RuntimeError):
+    """A compare-and-swap save found writes it has not seen (see save_data)."""
+
+
+def _sqlite():
+    """The SQLite backend, if selected (imported lazily)."""
+    if STORAGE_BACKEND != "sqlite":
+        return None
+    import sqlite_storage
+
+    return sqlite_storage
+
+
+@contextlib.contextmanager
+def _locked(lock=_lock, path=None):
+    """Hold an in-process lock and its cross-process file lock (LOCK_FILE)."""
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path or LOCK_FILE, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _snapshot_signature():
+    import season_file
+
+    return season_file.file_signature(DATA_FILE)
+
+
+def _read_counters(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_counters(path, counters):
+    # Not fsync'd: after a crash, ids and seqs are floored by what the
+    # (fsync'd) journal and snapshot hold
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(counters, f)
+
+
+def _load_snapshot():
     """
-    Load games + summaries from disk.
-    Returns: (games, summaries)
+    Read the snapshot file.
+    Returns: (games, summaries, journal_seq)
     """
     if not os.path.exists(DATA_FILE):
         # Nothing saved yet
-        return [], []
+        return [], [], 0
 
     try:
         with open(DATA_FILE, "r", encoding="utf-8") as f:
+            perf.count("bytes_read", os.fstat(f.fileno()).st_size)
             data = json.load(f)
     except json.JSONDecodeError:
         # Corrupt file or empty, start fresh
-        return [], []
+        return [], [], 0
 
     games = data.get("games", [])
     summaries = data.get("summaries", [])
+    return games, summaries, int(data.get("journal_seq", 0))
+
+
+def _number_summaries(summaries):
+    """
+    Give summaries saved before summary_ids existed their position as id
+    (what summary_index.SummaryIndex numbers them by), so every process
+    sees the same id for them and merges snapshots by id.
+    """
+    for position, summary in enumerate(summaries, 1):
+        if summary.get("summary_id") is None:
+            summary["summary_id"] = position
+    return summaries
+
+
+def _read_journal(offset=0):
+    """
+    Read journal events from byte offset on, stopping at a torn (half-written)
+    last line.
+    Returns: (events, good_bytes) where good_bytes is the length of the valid
+    part read.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        return [], 0
+
+    events = []
+    good_bytes = 0
+    with open(JOURNAL_FILE, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # crash mid-append: the event was never acknowledged
+                break
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            good_bytes += len(line)
+    perf.count("bytes_read", good_bytes)
+    return events, good_bytes
+
+
+def load_data():
+    """
+    Load games + summaries from disk: the last snapshot, then the journal tail.
+    Returns: (games, summaries)
+    """
+    with perf.stage("load_data"):
+        if _sqlite():
+            return _load_sqlite()
+        return _load_data_json()
+
+
+def load_table():
+    """
+    Like load_data(), but games come back as a game_table.GameTable.
+
+    With the JSON backend the snapshot is memory-mapped from SEASON_FILE when
+    that file still mirrors DATA_FILE, so the JSON is never parsed; otherwise
+    the JSON is loaded and SEASON_FILE (re)written for the next start.
+    Returns: (table, summaries)
+    """
+    from game_table import GameTable
+
+    with perf.stage("load_data"):
+        if _sqlite():
+            games, summaries = _load_sqlite()
+            return GameTable.from_games(games), summaries
+
+        with _locked():
+            mirror = _open_season_file()
+            if mirror is not None:
+                perf.count("bytes_read", os.path.getsize(SEASON_FILE))
+                return _load_locked(*mirror)
+
+            games, summaries, snapshot_seq = _load_snapshot()
+            table = GameTable.from_games(games)
+            del games
+            table, summaries = _load_locked(table, summaries, snapshot_seq)
+            _write_season_file(table.view(), summaries)
+            return table, summaries
+
+
+def _load_sqlite():
+    """load_data() for the SQLite backend; poll() reports changes from here on."""
+    global _last_seq
+
+    games, summaries, seq = _sqlite().load_data_at()
+    with _read_lock:
+        _last_seq = seq
+    return games, _number_summaries(summaries)
+
+
+def _open_season_file():
+    import season_file
+
+    return season_file.open_season(SEASON_FILE, _snapshot_signature())
+
+
+def _write_season_file(games, summaries):
+    """Mirror the snapshot (plus replayed journal events) into SEASON_FILE; hold _locked()."""
+    import season_file
+
+    source = _snapshot_signature()
+    if source is None or not hasattr(games, "table"):
+        return
+    try:
+        season_file.write_season(SEASON_FILE, games, summaries, _last_seq, source)
+    except OSError:
+        # only a start-up cache: the JSON snapshot is still there
+        pass
+
+
+def _load_data_json():
+    with _locked():
+        return _load_locked(*_load_snapshot())
+
+
+def _load_locked(games, summaries, snapshot_seq):
+    """Replay the journal onto a loaded snapshot and reset the module state; hold _locked()."""
+    global _last_seq, _journal_events, _journal_offset, _snapshot_sig
+    global _foreign, _snapshot_changed
+
+    with _read_lock:
+        last_seq = snapshot_seq
+        pending = 0
+
+        events, good_bytes = _read_journal()
+        _truncate_torn_tail(good_bytes)
+
+        for event in events:
+            seq = int(event.get("seq", 0))
+            if seq <= snapshot_seq:
+                # already folded into the snapshot (crash before truncation)
+                continue
+            if event.get("type") == "game":
+                games.append(event["data"])
+            elif event.get("type") == "summary":
+                summaries.append(event["data"])
+            last_seq = max(last_seq, seq)
+            pending += 1
+
+        _number_summaries(summaries)
+        _last_seq = max(last_seq, int(_read_counters(VERSION_FILE).get("version", 0)))
+        _journal_events = pending
+        _journal_offset = good_bytes
+        _snapshot_sig = _snapshot_signature()
+        _foreign = []
+        _snapshot_changed = False
     return games, summaries
 
 
-def save_data(games, summaries):
+def _truncate_torn_tail(good_bytes):
+    """Drop a half-written last line (a writer crashed mid-append); hold _locked()."""
+    if os.path.exists(JOURNAL_FILE) and os.path.getsize(JOURNAL_FILE) > good_bytes:
+        with open(JOURNAL_FILE, "r+b") as f:
+            f.truncate(good_bytes)
+            os.fsync(f.fileno())
+
+
+def _take_events(events, good_bytes):
+    """Fold journal lines read past _journal_offset into the read state; hold _read_lock."""
+    global _last_seq, _journal_events, _journal_offset
+
+    for event in events:
+        _last_seq = max(_last_seq, int(event.get("seq", 0)))
+        _journal_events += 1
+        if event.get("writer") != WRITER_ID:
+            _foreign.append(event)
+    _journal_offset += good_bytes
+
+
+def _catch_up():
+    """
+    Read what other processes wrote since this one last looked; hold
+    _locked() and _read_lock. Their events wait in _foreign for poll(). A
+    snapshot written by another process's compaction sets _snapshot_changed
+    (its journal was reset).
+    """
+    global _last_seq, _journal_events, _journal_offset, _snapshot_sig, _snapshot_changed
+
+    sig = _snapshot_signature()
+    if sig != _snapshot_sig:
+        _snapshot_sig = sig
+        _snapshot_changed = True
+        _journal_offset = 0
+        _journal_events = 0
+
+    _take_events(*_read_journal(_journal_offset))
+    _truncate_torn_tail(_journal_offset)
+    _last_seq = max(_last_seq, int(_read_counters(VERSION_FILE).get("version", 0)))
+
+
+def _changed_on_disk():
+    """Cheap check (two stats, no lock) for writes by other processes."""
+    try:
+        journal_size = os.path.getsize(JOURNAL_FILE)
+    except OSError:
+        journal_size = 0
+    return journal_size != _journal_offset or _snapshot_signature() != _snapshot_sig
+
+
+def poll():
+    """
+    Events other processes wrote since the last call.
+
+    Returns: (events, snapshot) where events are journal events
+    ({"seq", "type", "writer", "data"}) and snapshot is None, or
+    (games table, summaries) read from DATA_FILE when another process
+    compacted: its events may then only be in the snapshot, so callers
+    merge it by game_id / summary_id. The SQLite backend reports the same
+    from its changes table (snapshot after another process's save_data).
+    """
+    global _foreign, _snapshot_changed
+
+    if _sqlite():
+        return _poll_sqlite()
+    if not (_foreign or _snapshot_changed or _changed_on_disk()):
+        return [], None
+
+    with _read_lock:
+        sig = _snapshot_signature()
+        if sig == _snapshot_sig and not _snapshot_changed:
+            # Without the file lock: writers append whole lines (a torn last
+            # line is left for later), and the journal is only reset after
+            # DATA_FILE is replaced, which the second signature check catches
+            events, good_bytes = _read_journal(_journal_offset)
+            if _snapshot_signature() == sig:
+                _take_events(events, good_bytes)
+                events, _foreign = _foreign, []
+                return events, None
+
+    # another process compacted: read its snapshot under the file lock
+    with _locked(), _read_lock:
+        _catch_up()
+        events, snapshot = _foreign, None
+        if _snapshot_changed:
+            snapshot = _read_snapshot_table()
+        _foreign, _snapshot_changed = [], False
+    return events, snapshot
+
+
+def _poll_sqlite():
+    """poll() for the SQLite backend: rows of its changes table past _last_seq."""
+    global _last_seq
+    from game_table import GameTable
+
+    with _read_lock:
+        events, snapshot, seq = _sqlite().changes_since(_last_seq, WRITER_ID)
+        _last_seq = max(_last_seq, seq)
+    if snapshot is not None:
+        games, summaries = snapshot
+        snapshot = (GameTable.from_games(games), _number_summaries(summaries))
+    return events, snapshot
+
+
+def _read_snapshot_table():
+    """DATA_FILE as (GameTable, summaries), via SEASON_FILE when current; hold _locked()."""
+    from game_table import GameTable
+
+    mirror = _open_season_file()
+    if mirror is not None:
+        return mirror[0], _number_summaries(mirror[1])
+    games, summaries, _ = _load_snapshot()
+    return GameTable.from_games(games), _number_summaries(summaries)
+
+
+def data_version():
+    """
+    Seq of the newest event this process has written or read (with SQLite:
+    the newest row of its changes table seen by load or poll()).
+    """
+    return _last_seq
+
+
+def allocate_ids(kind, n=1, floor=0):
+    """
+    Reserve n consecutive ids of kind "game_id" or "summary_id", unique
+    across every process sharing the files. floor: the highest id the caller
+    already knows of (ids saved before VERSION_FILE existed).
+    Returns: the first reserved id.
+    """
+    if _sqlite():
+        return _sqlite().allocate_ids(kind, n, floor)
+
+    with _locked(_id_lock, ID_LOCK_FILE):
+        ids = _read_counters(ID_FILE)
+        first = max(int(ids.get(kind, 0)), floor) + 1
+        ids[kind] = first + n - 1
+        _write_counters(ID_FILE, ids)
+    return first
+
+
+def _append_events(event_type, items):
+    """Append one event per item in a single write + fsync."""
+    global _last_seq, _journal_events, _journal_offset
+
+    with _locked():
+        # other writers' events first, so seqs stay increasing across processes
+        with _read_lock:
+            _catch_up()
+            first_seq = _last_seq + 1
+            start = _journal_offset
+
+        lines = []
+        for seq, data in enumerate(items, first_seq):
+            event = {"seq": seq, "type": event_type, "writer": WRITER_ID, "data": data}
+            lines.append(json.dumps(event) + "\n")
+        payload = "".join(lines).encode("utf-8")
+        with open(JOURNAL_FILE, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with _read_lock:
+            # a poll() during the fsync may already have read (and counted) these
+            if _journal_offset == start:
+                _journal_offset = start + len(payload)
+                _journal_events += len(items)
+            _last_seq = max(_last_seq, first_seq + len(items) - 1)
+        _write_counters(VERSION_FILE, {"version": _last_seq})
+
+
+def _append_event(event_type, data):
+    _append_events(event_type, [data])
+
+
+def append_game(game):
+    """Durably record one new game (O(1 game), fsync'd)."""
+    if _sqlite():
+        return _sqlite().append_game(game, writer=WRITER_ID)
+    _append_event("game", game)
+
+
+def append_games(games):
+    """Durably record a batch of new games with one fsync (bulk imports)."""
+    if _sqlite():
+        return _sqlite().append_games(games, writer=WRITER_ID)
+    _append_events("game", games)
+
+
+def append_summary(summary):
+    """Durably record one new summary snapshot (fsync'd)."""
+    if _sqlite():
+        return _sqlite().append_summary(summary, writer=WRITER_ID)
+    _append_event("summary", summary)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _dump_snapshot(f, games, summaries, journal_seq):
+    """
+    Write {"games": [...], "summaries": [...], "journal_seq": n} to f, a chunk
+    of games at a time: any sequence of games (e.g. a game_table view) is
+    read one game at a time, never as one list of dicts.
+    """
+    f.write('{"games":[')
+    for start in range(0, len(games), SNAPSHOT_CHUNK):
+        chunk = games[start:start + SNAPSHOT_CHUNK]
+        if start:
+            f.write(",")
+        f.write(",".join(json.dumps(game, separators=(",", ":")) for game in chunk))
+    f.write('],"summaries":')
+    json.dump(list(summaries), f, separators=(",", ":"))
+    f.write(f',"journal_seq":{int(journal_seq)}}}')
+
+
+def save_data(games, summaries, expected_version=None):
+    """
+    Save games + summaries to disk as a JSON snapshot and reset the journal.
+
+    The snapshot is written to a temp file, fsync'd and atomically renamed over
+    DATA_FILE, so a crash leaves either the old or the new snapshot. It records
+    the journal seq it covers, so events left in the journal by a crash before
+    truncation are skipped on replay.
+
+    expected_version: compare-and-swap. If given, raise StaleDataError instead
+    of saving when anything was written (by any process) that the caller has
+    not seen: the data version moved past expected_version, or poll() has
+    events not yet handed out.
+    """
+    global _journal_events, _journal_offset, _snapshot_sig
+
+    if _sqlite():
+        # one transaction; the SQLite backend has no journal to race with
+        return _sqlite().save_data(games, summaries, writer=WRITER_ID)
+
+    with _locked():
+        with _read_lock:
+            _catch_up()
+            if expected_version is not None and (
+                _foreign or _snapshot_changed or _last_seq != expected_version
+            ):
+                raise StaleDataError(
+                    f"data is at version {_last_seq}, caller has seen {expected_version}"
+                )
+
+        tmp_file = DATA_FILE + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            _dump_snapshot(f, games, summaries, _last_seq)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, DATA_FILE)
+        _fsync_dir(DATA_FILE)
+
+        with _read_lock:
+            # Everything up to _last_seq is in the snapshot now
+            _snapshot_sig = _snapshot_signature()
+            with open(JOURNAL_FILE, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+            _journal_events = 0
+            _journal_offset = 0
+
+        # keyed to the new snapshot's signature: a crash before this leaves
+        # the old mirror, which no longer matches and is ignored
+        _write_season_file(games, summaries)
+
+
+def maybe_compact(games, summaries, expected_version=None):
     """
-    Save games + summaries to disk as JSON.
+    Fold the journal into a new snapshot once it holds COMPACT_EVERY events.
+    Raises StaleDataError like save_data(expected_version=...).
     """
-    data = {
-        "games": games,
-        "summaries": summaries,
-    }
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    if _sqlite():
+        # every SQLite append is already its own transaction
+        return False
+    if _journal_events >= COMPACT_EVERY:
+        save_data(games, summaries, expected_version)
+        return True
+    return False
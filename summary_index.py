@@ -0,0 +1,153 @@
+# summary_index.py
+#
+# Summary snapshots, stored compactly: each one references the last game it
+# covers (game_id watermark) and holds only the standings cells that changed
+# since the previous snapshot. A full table (keyframe) is written every
+# SUMMARY_KEYFRAME_EVERY snapshots so materializing never replays long chains.
+#
+#   keyframe: {"summary_id", "label", "game_id", "standings": [row, ...]}
+#   delta:    {"summary_id", "label", "game_id", "base_id",
+#              "delta": {player: {column: value}}, "order": [player, ...]}
+#
+# "order" is only present when the row order changed. Summaries saved before
+# this format ({"label", "standings"}) are read as keyframes.
+import threading
+
+# A full standings table is stored at least every this many snapshots
+SUMMARY_KEYFRAME_EVERY = 20
+
+ROW_KEY = "Player"
+
+
+def _order(rows):
+    return [row[ROW_KEY] for row in rows]
+
+
+def encode_summary(summary_id, label, rows, game_id=None, previous=None, keyframe=False):
+    """
+    Build the stored record for a new snapshot.
+
+    previous: (summary_id, rows) of the snapshot to diff against, or None.
+    Falls back to a keyframe when there is nothing to diff against or the
+    players / columns changed.
+    """
+    record = {"summary_id": summary_id, "label": label, "game_id": game_id}
+
+    if previous is not None and not keyframe:
+        base_id, base_rows = previous
+        base = {row[ROW_KEY]: row for row in base_rows}
+        same_shape = set(base) == {row[ROW_KEY] for row in rows} and all(
+            set(row) == set(base[row[ROW_KEY]]) for row in rows
+        )
+        if same_shape:
+            delta = {}
+            for row in rows:
+                old = base[row[ROW_KEY]]
+                changed = {col: v for col, v in row.items() if old[col] != v}
+                if changed:
+                    delta[row[ROW_KEY]] = changed
+            record["base_id"] = base_id
+            record["delta"] = delta
+            if _order(rows) != _order(base_rows):
+                record["order"] = _order(rows)
+            return record
+
+    record["standings"] = [dict(row) for row in rows]
+    return record
+
+
+def apply_delta(base_rows, record):
+    """Rows of a delta record, given the materialized rows of its base."""
+    by_key = {row[ROW_KEY]: dict(row) for row in base_rows}
+    for key, changed in record["delta"].items():
+        by_key[key].update(changed)
+    order = record.get("order") or _order(base_rows)
+    return [by_key[key] for key in order]
+
+
+class SummaryIndex:
+    """
+    Label / ID index over the (append-only) summaries list.
+
+    Lookups by summary_id are O(1); by_label[label] lists every summary_id
+    saved under that label, oldest first, so duplicates stay reachable.
+    Standings tables are materialized lazily, on first request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+        self.by_id = {}
+        self.by_label = {}
+        self._rows = {}
+        self._since_keyframe = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def sync(self, summaries):
+        """Index summaries appended since the last call."""
+        with self._lock:
+            for record in summaries[len(self.records):]:
+                summary_id = record.get("summary_id")
+                if summary_id is None:
+                    # pre-index summaries: number them by position
+                    summary_id = len(self.records) + 1
+                self.by_id[summary_id] = record
+                self.by_label.setdefault(record.get("label", ""), []).append(summary_id)
+                self.records.append(record)
+                if "standings" in record:
+                    self._since_keyframe = 0
+                else:
+                    self._since_keyframe += 1
+
+    @property
+    def ids(self):
+        """summary_ids in save order."""
+        return list(self.by_id)
+
+    @property
+    def next_summary_id(self):
+        return max(self.by_id, default=0) + 1
+
+    @property
+    def last_id(self):
+        return next(reversed(self.by_id), None)
+
+    def encode(self, label, rows, game_id=None, summary_id=None):
+        """
+        Record for a new snapshot, diffed against the latest one.
+        summary_id defaults to next_summary_id (pass one from
+        storage.allocate_ids when other processes save summaries too).
+        """
+        last_id = self.last_id
+        previous = None if last_id is None else (last_id, self.materialize(last_id))
+        return encode_summary(
+            self.next_summary_id if summary_id is None else summary_id,
+            label,
+            rows,
+            game_id=game_id,
+            previous=previous,
+            keyframe=self._since_keyframe + 1 >= SUMMARY_KEYFRAME_EVERY,
+        )
+
+    def materialize(self, summary_id):
+        """The standings rows of one summary (cached after the first call)."""
+        with self._lock:
+            if summary_id in self._rows:
+                return self._rows[summary_id]
+
+            # Walk back to the nearest keyframe (or already materialized base)
+            chain = []
+            current = summary_id
+            while current not in self._rows and "standings" not in self.by_id[current]:
+                chain.append(current)
+                current = self.by_id[current]["base_id"]
+            if current not in self._rows:
+                self._rows[current] = self.by_id[current]["standings"]
+
+            rows = self._rows[current]
+            for delta_id in reversed(chain):
+                rows = apply_delta(rows, self.by_id[delta_id])
+                self._rows[delta_id] = rows
+            return rows
@@ -2,11 +2,27 @@
 import streamlit as st
 import pandas as pd
 
+from frame_cache import get_frame_cache, frame_key
+from shared_store import get_shared_season, refresh_session_views
+
+
+def summary_option_label(index, summary_id):
+    """Selectbox text for a summary; duplicate labels get their ID appended."""
+    record = index.by_id[summary_id]
+    label = record.get("label", "")
+    text = label
+    if len(index.by_label.get(label, [])) > 1:
+        text += f" (#{summary_id})"
+    if record.get("game_id") is not None:
+        text += f" · after Game {record['game_id']}"
+    return text
+
 
 def summary_storage_page(players):
     st.header("Summary Sheets")
 
-    summaries = st.session_state.summaries
+    season = get_shared_season()
+    index = season.summary_index
 
     # Save current standings as snapshot
     st.subheader("Save current standings as a summary")
@@ -20,28 +36,42 @@ def summary_storage_page(players):
             st.warning("Please enter a label.")
         else:
             df = st.session_state.current_standings
-            snapshot = {
-                "label": label.strip(),
-                "standings": df.to_dict(orient="records"),
-            }
-            summaries.append(snapshot)
-            st.session_state.summaries = summaries
+            summary = season.save_summary(
+                label.strip(),
+                df.to_dict(orient="records"),
+                game_id=st.session_state.get("current_standings_game_id"),
+            )
+            refresh_session_views()
             st.success(f"Saved summary: {label.strip()}")
+            if len(index.by_label[label.strip()]) > 1:
+                st.info(
+                    f"Another summary already uses this label; "
+                    f"this one is #{summary['summary_id']}."
+                )
 
     st.markdown("---")
 
     # List existing summaries
     st.subheader("Saved summaries")
 
-    if not summaries:
+    # Only summaries this session's view has seen (same as the games view)
+    summary_ids = index.ids[: len(st.session_state.summaries)]
+    if not summary_ids:
         st.info("No summaries saved yet.")
         return
 
-    labels = [s["label"] for s in summaries]
-    chosen_label = st.selectbox("Choose a summary to view", labels)
+    chosen_id = st.selectbox(
+        "Choose a summary to view",
+        summary_ids,
+        format_func=lambda summary_id: summary_option_label(index, summary_id),
+    )
 
-    selected = next(s for s in summaries if s["label"] == chosen_label)
+    selected = index.by_id[chosen_id]
     st.markdown(f"### {selected['label']}")
 
-    df = pd.DataFrame(selected["standings"])
+    # Materialized (delta chain replayed) only when a summary is viewed
+    df = get_frame_cache().get_or_build(
+        frame_key("summary_df", players, chosen_id),
+        lambda: pd.DataFrame(index.materialize(chosen_id)),
+    )
     st.table(df)
@@ -0,0 +1,84 @@
+# synthetic.py
+#
+# Synthetic season generator for benchmarks and load tests.
+#
+#   python synthetic.py 1000 --seed 7 > games.jsonl
+import argparse
+import json
+import random
+import sys
+
+from scoring import DEFAULT_RULESET, compute_game_points
+
+DEFAULT_PLAYERS = ["Amber", "Mandeep", "Rav", "Simer"]
+
+# Bonus stars (0-3) are likelier for better placements
+STAR_WEIGHTS = {
+    1: [30, 35, 25, 10],
+    2: [45, 35, 15, 5],
+    3: [60, 28, 10, 2],
+    4: [75, 20, 4, 1],
+}
+
+# Coins held at game end: mean / spread by placement
+COIN_MEAN = {1: 70, 2: 50, 3: 38, 4: 25}
+COIN_SPREAD = 22
+
+# Chance that a game has a "most items" / "most spaces" winner at all
+SINGLE_WINNER_CHANCE = 0.9
+
+
+def generate_game(rng, game_id, players=DEFAULT_PLAYERS):
+    """One valid game: a placement permutation, stars, coins, single-winner flags."""
+    placements = list(range(1, len(players) + 1))
+    rng.shuffle(placements)
+
+    results = {}
+    for p, placement in zip(players, placements):
+        weights = STAR_WEIGHTS.get(placement, STAR_WEIGHTS[4])
+        coins = int(rng.gauss(COIN_MEAN.get(placement, COIN_MEAN[4]), COIN_SPREAD))
+        results[p] = {
+            "placement": placement,
+            "bonus_stars": rng.choices((0, 1, 2, 3), weights)[0],
+            "coins": min(max(coins, 0), 999),
+            "most_items_used": False,
+            "most_spaces_travelled": False,
+        }
+
+    if rng.random() < SINGLE_WINNER_CHANCE:
+        results[rng.choice(players)]["most_items_used"] = True
+    if rng.random() < SINGLE_WINNER_CHANCE:
+        results[rng.choice(players)]["most_spaces_travelled"] = True
+
+    game = {"game_id": game_id, "results": results, "ruleset": DEFAULT_RULESET}
+    game["points"] = compute_game_points(game, players)
+    return game
+
+
+def iter_season(n_games, players=DEFAULT_PLAYERS, seed=0, first_game_id=1):
+    """Yield n_games synthetic games with consecutive game_ids."""
+    rng = random.Random(seed)
+    for game_id in range(first_game_id, first_game_id + n_games):
+        yield generate_game(rng, game_id, players)
+
+
+def generate_season(n_games, players=DEFAULT_PLAYERS, seed=0):
+    """A whole synthetic season as a list, in game_id order."""
+    return list(iter_season(n_games, players, seed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic games as JSON lines.")
+    parser.add_argument("n_games", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", help="comma-separated player names")
+    args = parser.parse_args(argv)
+
+    players = args.players.split(",") if args.players else DEFAULT_PLAYERS
+    for game in iter_season(args.n_games, players, args.seed):
+        sys.stdout.write(json.dumps(game) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
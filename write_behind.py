@@ -0,0 +1,142 @@
+# write_behind.py
+#
+# Background persistence: saves are queued and written by a single writer
+# thread, so a click returns as soon as the change is in memory. Events that
+# pile up while a write is in flight go out together in the next write (one
+# fsync for the whole burst). Whatever is queued at interpreter exit is
+# flushed by an atexit hook.
+import atexit
+import queue
+import threading
+import time
+
+# submit() blocks once this many events are waiting (back-pressure rather
+# than unbounded memory if the disk stalls)
+WRITE_QUEUE_SIZE = 1000
+
+# Most events written (and fsync'd) together
+WRITE_BATCH_SIZE = 500
+
+# Seconds to wait before retrying a failed write
+RETRY_DELAY = 1.0
+
+# Seconds close() waits for the queue to drain at exit
+CLOSE_TIMEOUT = 10.0
+
+_STOP = object()
+
+
+class WriteBehind:
+    """
+    One writer thread behind a bounded queue.
+
+    write(events) runs on the writer thread with a list of (kind, data) in
+    submission order and must only return once they are durable. A write
+    that makes events durable one part at a time removes each part from the
+    front of the list as it lands, so a failed write is retried with only
+    the events not written yet. after_write(), if given, runs after every
+    successful write (e.g. compaction).
+    """
+
+    def __init__(self, write, after_write=None,
+                 maxsize=WRITE_QUEUE_SIZE, batch_size=WRITE_BATCH_SIZE):
+        self._write = write
+        self._after_write = after_write
+        self._batch_size = batch_size
+        self._queue = queue.Queue(maxsize)
+        self._cond = threading.Condition()
+        self.submitted = 0
+        self.flushed = 0
+        self.writes = 0
+        self.last_error = None
+        # after_write failures; they leave every event durable
+        self.compact_error = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, kind, data):
+        """Queue one event (blocks only while the queue is full)."""
+        with self._cond:
+            self.submitted += 1
+        self._queue.put((kind, data))
+
+    @property
+    def pending(self):
+        return self.submitted - self.flushed
+
+    def state(self):
+        """
+        Durability of everything submitted so far ("error": a write is
+        failing and being retried; a failed after_write only shows up as
+        compact_error).
+        Returns: {"state": "flushed" | "pending" | "error", "pending": int,
+                  "writes": int, "error": str or None,
+                  "compact_error": str or None}
+        """
+        with self._cond:
+            pending = self.submitted - self.flushed
+            error = self.last_error
+            compact_error = self.compact_error
+            writes = self.writes
+        if error is not None:
+            state = "error"
+        else:
+            state = "pending" if pending else "flushed"
+        return {"state": state, "pending": pending, "writes": writes, "error": error,
+                "compact_error": compact_error}
+
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is durable; False on timeout."""
+        with self._cond:
+            target = self.submitted
+            return self._cond.wait_for(lambda: self.flushed >= target, timeout)
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Flush the queue and stop the writer thread (runs at exit)."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = [e for e in batch if e is not _STOP]
+            stopping = len(events) < len(batch)
+            if events:
+                self._write_batch(events)
+
+    def _write_batch(self, events):
+        n_events = len(events)
+        while True:
+            try:
+                self._write(events)
+                break
+            except Exception as exc:
+                with self._cond:
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                time.sleep(RETRY_DELAY)
+
+        with self._cond:
+            self.flushed += n_events
+            self.writes += 1
+            self.last_error = None
+            self._cond.notify_all()
+
+        if self._after_write is not None:
+            try:
+                self._after_write()
+            except Exception as exc:
+                # the events are durable in the journal; only compaction failed
+                with self._cond:
+                    self.compact_error = f"{type(exc).__name__}: {exc}"
+            else:
+                with self._cond:
+                    self.compact_error = None